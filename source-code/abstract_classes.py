@@ -21,7 +21,26 @@ class AbstractWanderingGame(ABC):
 # Abstract class defining the interface for the Wandering Game itself.
 class AbstractGameLauncher(ABC):
     
-    # Abstract Method to Launch the game for a specific level.
+    # Abstract Method to Launch the game for a specific level, inside session when one is given.
     @abstractmethod
-    def launch_game(self):
-        pass
\ No newline at end of file
+    def launch_game(self, session=None):
+        pass
+
+# Abstract class defining how a walker chooses where to go next.
+class AbstractWalkerStrategy(ABC):
+
+    # Abstract method returning the cell a walker on cell moves to, drawing from rng (a random.Random).
+    @abstractmethod
+    def next_cell(self, topology, cell, rng):
+        pass
+
+    # Abstract method moving a whole numpy array of walkers at once, drawing from rng (a numpy Generator).
+    # Cells from topology.num_cells on hold walkers that were merged away; they must stay where they are.
+    @abstractmethod
+    def next_cells(self, topology, cells, rng):
+        pass
+
+    # Abstract method returning the strategy's name and parameters, so exported games can be replayed.
+    @abstractmethod
+    def to_dict(self):
+        pass
@@ -0,0 +1,131 @@
+import queue
+import threading
+
+# Command names understood by the audio worker.
+LOAD_MUSIC, PLAY_MUSIC, STOP_MUSIC, SAY, CLOSE = "load_music", "play_music", "stop_music", "say", "close"
+CLOSE_TIMEOUT = 2.0  # Seconds close() waits for the worker to finish the sentence it is speaking
+MUSIC_FILE = "happy-and-joyful-children.wav"  # Background music of the K-2 level
+
+
+class SilentBackend:
+    # Plays nothing and only records the commands; used for headless runs and when no audio device is available.
+    def __init__(self):
+        self.commands = []
+
+    def load_music(self, path):
+        self.commands.append((LOAD_MUSIC, path))
+
+    def play_music(self, loops):
+        self.commands.append((PLAY_MUSIC, loops))
+
+    def stop_music(self):
+        self.commands.append((STOP_MUSIC,))
+
+    def say(self, text):
+        self.commands.append((SAY, text))
+
+    def close(self):
+        self.commands.append((CLOSE,))
+
+
+class DesktopBackend:
+    # Music through pygame.mixer and speech through pyttsx3. Created on the worker thread, which is the only
+    # thread that ever touches the two libraries.
+    def __init__(self):
+        import pygame
+        import pyttsx3
+        pygame.mixer.init()
+        self.__mixer = pygame.mixer
+        self.__speech_engine = pyttsx3.init()
+
+    def load_music(self, path):
+        self.__mixer.music.load(path)
+
+    def play_music(self, loops):
+        self.__mixer.music.play(loops=loops)
+
+    def stop_music(self):
+        self.__mixer.music.stop()
+
+    def say(self, text):
+        self.__speech_engine.say(text)
+        self.__speech_engine.runAndWait()  # Blocks the worker only, never the Tk main loop
+
+    def close(self):
+        self.__speech_engine.stop()
+        self.__mixer.quit()
+
+
+def create_backend():
+    try:
+        return DesktopBackend()
+    except Exception as e:  # Missing libraries or no sound device: the game still runs, silently
+        print(f"Audio disabled: {e}")
+        return SilentBackend()
+
+
+class AudioService:
+    # Music and speech run on one worker thread fed by a command queue, so every call returns immediately.
+    # The worker and its backend are only started by the first command.
+    def __init__(self, backend_factory=create_backend):
+        self.__backend_factory = backend_factory
+        self.__commands = queue.Queue()
+        self.__thread = None
+        self.__speech_generation = 0  # Sentences queued before the latest cancel_speech() are skipped
+        self.__lock = threading.Lock()
+
+    def __send(self, *command):
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="audio", daemon=True)
+                self.__thread.start()
+            self.__commands.put(command)
+
+    def load_music(self, path):
+        self.__send(LOAD_MUSIC, path)
+
+    def play_music(self, loops=-1):
+        self.__send(PLAY_MUSIC, loops)
+
+    def stop_music(self):
+        self.__send(STOP_MUSIC)
+
+    # Speak the sentences one after another, after anything queued before them.
+    def say(self, *sentences):
+        for sentence in sentences:
+            self.__send(SAY, sentence, self.__speech_generation)
+
+    # Drop every sentence that has not been spoken yet; the one being spoken is finished.
+    def cancel_speech(self):
+        self.__speech_generation += 1
+
+    def close(self):
+        with self.__lock:
+            thread = self.__thread
+            if thread is None:
+                return
+            self.cancel_speech()
+            self.__commands.put((CLOSE,))
+            self.__thread = None
+        thread.join(CLOSE_TIMEOUT)
+
+    def __run(self):
+        backend = self.__backend_factory()
+        while True:
+            command = self.__commands.get()
+            name = command[0]
+            if name == CLOSE:
+                backend.close()
+                return
+            try:
+                if name == SAY:
+                    if command[2] == self.__speech_generation:
+                        backend.say(command[1])
+                elif name == LOAD_MUSIC:
+                    backend.load_music(command[1])
+                elif name == PLAY_MUSIC:
+                    backend.play_music(command[1])
+                elif name == STOP_MUSIC:
+                    backend.stop_music()
+            except Exception as e:  # A failing command, e.g. a missing music file, must not stop the worker
+                print(f"Audio command {name} failed: {e}")
@@ -0,0 +1,183 @@
+import numpy as np
+from grid_topology import get_topology
+from simulation import RULE_MEET, RULE_MERGE
+
+# Moves are drawn from random bytes. Every cell has 2, 3 or 4 valid moves, so the bytes below BYTE_LIMIT
+# split evenly between them; the table sends the remaining bytes to REDRAW and those walkers draw again.
+MOVE_DRAWS = 256
+BYTE_LIMIT = 240
+REDRAW = -1
+
+
+class BatchResult:
+    def __init__(self, grid_size, start_positions, rule, merge_times, finish_times, steps_run):
+        self.grid_size = grid_size              # Size of the grid (width, height)
+        self.start_positions = start_positions  # Start layout shared by every game
+        self.rule = rule
+        # merge_times[game, k] is the step of the k-th merge, -1 if it never happened
+        # (a game has fewer merges than players - 1 when three walkers meet at once)
+        self.merge_times = merge_times
+        self.finish_times = finish_times        # Step at which each game was over, -1 if max_steps came first
+        self.steps_run = steps_run              # Number of vectorized steps that were simulated
+
+    def get_num_games(self):
+        return self.finish_times.shape[0]
+
+    def get_meeting_times(self):
+        # Step at which two walkers first shared a cell
+        return self.merge_times[:, 0]
+
+    def get_finish_times(self):
+        return self.finish_times
+
+    def get_finished_mask(self):
+        return self.finish_times >= 0
+
+    def summary(self):
+        # Summary of the finished games' meeting and finish times
+        summary = {"games": int(self.get_num_games()), "finished": int(self.get_finished_mask().sum())}
+        for name, times in (("meeting", self.get_meeting_times()), ("finish", self.finish_times)):
+            times = times[times >= 0]
+            if times.size == 0:
+                continue
+            summary[name] = {
+                "mean": float(times.mean()),
+                "std": float(times.std()),
+                "min": int(times.min()),
+                "max": int(times.max()),
+                "p50": float(np.percentile(times, 50)),
+                "p95": float(np.percentile(times, 95)),
+                "p99": float(np.percentile(times, 99)),
+            }
+        return summary
+
+
+def build_move_table(grid_size, num_sentinels=0):
+    # move_table[cell, byte] is the cell reached from cell (y * width + x) for a random byte.
+    # Sentinel cells placed after the grid only lead to themselves; removed walkers are parked there.
+    topology = get_topology(*grid_size)
+    num_cells = topology.num_cells
+    offsets = np.frombuffer(topology.offsets, dtype=np.int32).astype(np.int64)
+    targets = np.frombuffer(topology.targets, dtype=np.int32)
+    degree = np.diff(offsets)
+
+    draws = np.arange(MOVE_DRAWS)
+    choice = np.minimum(draws, BYTE_LIMIT - 1)[None, :] * degree[:, None] // BYTE_LIMIT
+    table = np.where(draws < BYTE_LIMIT, targets[offsets[:-1, None] + choice], REDRAW)
+    sentinels = np.repeat(np.arange(num_cells, num_cells + num_sentinels)[:, None], MOVE_DRAWS, axis=1)
+    return np.concatenate([table, sentinels]).astype(np.int32)
+
+
+def move_all(rng, move_table, positions):
+    # One random byte per walker and a single gather move every walker of every game
+    draws = np.frombuffer(rng.bytes(positions.size), dtype=np.uint8).reshape(positions.shape)
+    index = positions.astype(np.intp)
+    index *= MOVE_DRAWS
+    index += draws
+    moved = np.take(move_table, index)
+
+    redraw = np.flatnonzero(moved == REDRAW)
+    while redraw.size:
+        redrawn = np.frombuffer(rng.bytes(redraw.size), dtype=np.uint8)
+        moved.flat[redraw] = move_table[positions.flat[redraw].astype(np.intp) * MOVE_DRAWS + redrawn]
+        redraw = redraw[redrawn >= BYTE_LIMIT]
+    return moved
+
+
+def run_batch(grid_size, start_positions, num_games, rule=RULE_MERGE, seed=None, max_steps=None, rng=None, strategies=None):
+    # Simulate num_games independent games at once. start_positions is a list of (x, y) cells.
+    # Walkers starting on cells of different colors of the checkerboard can never meet, since they all
+    # move at the same time, so pass max_steps unless the layout is known to finish.
+    # strategies: one walker strategy for every player, or one per start position, as in WanderingSimulation.
+    # They move their walkers through their vectorized next_cells(); the default is the uniform random walk.
+    if rule not in (RULE_MEET, RULE_MERGE):
+        raise ValueError(f"Unknown rule: {rule}")
+    if len(start_positions) < 2:
+        raise ValueError("At least two players are needed.")
+    rng = rng if rng is not None else np.random.default_rng(seed)
+
+    width = grid_size[0]
+    num_cells = grid_size[0] * grid_size[1]
+    num_players = len(start_positions)
+    num_merges = 1 if rule == RULE_MEET else num_players - 1
+    move_table = build_move_table(grid_size, num_sentinels=num_players).ravel()
+    sentinel = (num_cells + np.arange(num_players, dtype=np.int32))[:, None]
+    pairs = [(i, j) for i in range(num_players) for j in range(i + 1, num_players)]
+    topology = get_topology(*grid_size)
+    strategy_slots = None
+    if strategies is not None:
+        if not isinstance(strategies, (list, tuple)):
+            strategies = [strategies] * num_players
+        if len(strategies) != num_players:
+            raise ValueError("Give one walker strategy per start position.")
+        # Player slots grouped by strategy, so each strategy moves all of its walkers with one call.
+        # A merged group keeps its leader's slot and with it the leader's strategy, like in WanderingSimulation.
+        strategy_slots = {}
+        for slot, strategy in enumerate(strategies):
+            strategy_slots.setdefault(strategy, []).append(slot)
+        strategy_slots = [(strategy, np.array(slots)) for strategy, slots in strategy_slots.items()]
+
+    # State of the running games, one row per player slot. A walker that was merged away is parked
+    # on its slot's sentinel cell, so it never collides again and needs no mask in the hot loop.
+    games = np.arange(num_games)
+    positions = np.repeat(np.array([[y * width + x] for x, y in start_positions], dtype=np.int32), num_games, axis=1)
+    # Iteration order of the walkers; merged groups go to the back like in the GUI's player list
+    order = np.repeat(np.arange(num_players)[:, None], num_games, axis=1)
+    merges_done = np.zeros(num_games, dtype=np.int64)
+    merge_times = np.full((num_games, num_merges), -1, dtype=np.int64)
+    finish_times = np.full(num_games, -1, dtype=np.int64)
+    running = num_games
+
+    step = 0
+    while running and (max_steps is None or step < max_steps):
+        step += 1
+        if strategy_slots is None:
+            positions = move_all(rng, move_table, positions)
+        else:
+            for strategy, slots in strategy_slots:
+                if strategy is None:
+                    positions[slots] = move_all(rng, move_table, positions[slots])
+                else:
+                    positions[slots] = strategy.next_cells(topology, positions[slots], rng)
+
+        collided = positions[0] == positions[1]
+        for i, j in pairs[1:]:
+            collided |= positions[i] == positions[j]
+        hit = np.flatnonzero(collided)
+        if hit.size == 0:
+            continue
+
+        # Work out the merges of the few games that had a collision this step
+        hit_positions = positions[:, hit]
+        colliding = np.zeros(hit_positions.shape, dtype=bool)
+        for i, j in pairs:
+            same = hit_positions[i] == hit_positions[j]
+            colliding[i] |= same
+            colliding[j] |= same
+        # Only one group merges per step: the one holding the last colliding walker in iteration order
+        leader = np.where(colliding, order[:, hit], -1).argmax(axis=0)
+        columns = np.arange(hit.size)
+        merged_position = hit_positions[leader, columns]
+        group = hit_positions == merged_position
+        group[leader, columns] = False
+        hit_positions = np.where(group, sentinel, hit_positions)
+        order[leader, hit] = num_players + merges_done[hit]
+        merge_times[games[hit], merges_done[hit]] = step
+        merges_done[hit] += 1
+
+        # Games that are over park all their walkers so they never collide again
+        if rule == RULE_MEET:
+            finished = np.ones(hit.size, dtype=bool)
+        else:
+            finished = (hit_positions < num_cells).sum(axis=0) == 1
+        hit_positions[:, finished] = sentinel
+        positions[:, hit] = hit_positions
+        finish_times[games[hit[finished]]] = step
+        running -= int(finished.sum())
+
+        # Drop the finished games once they make up most of the arrays
+        if running * 2 < games.size:
+            keep = (positions < num_cells).any(axis=0)
+            games, positions, order, merges_done = games[keep], positions[:, keep], order[:, keep], merges_done[keep]
+
+    return BatchResult(grid_size, list(start_positions), rule, merge_times, finish_times, step)
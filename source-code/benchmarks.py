@@ -0,0 +1,225 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+from batch_simulation import run_batch
+from grid_topology import get_topology
+from renderer import BoardRenderer, draw_grid
+from simulation import WanderingSimulation, RULE_MEET, RULE_MERGE
+
+# Benchmarks are registered here by the @benchmark decorator, in the order they are defined.
+BENCHMARKS = []
+DEFAULT_TOLERANCE = 0.2  # A benchmark more than 20% slower than the baseline is a regression
+
+
+class Benchmark:
+    def __init__(self, name, function, number, needs_display):
+        self.name = name
+        self.function = function            # Called with number, performs number operations
+        self.number = number                # Operations per timed run
+        self.needs_display = needs_display  # Tk benchmarks need a display, e.g. run them under xvfb-run
+
+
+def benchmark(name, number, needs_display=False):
+    def register(function):
+        BENCHMARKS.append(Benchmark(name, function, number, needs_display))
+        return function
+    return register
+
+
+def corner_players(grid_size, count):
+    # Up to four players in the corners, the rest row by row on the free cells of the same checkerboard
+    # color as (0, 0), so every player can meet every other one (on odd-sized grids, like the ones used here)
+    width, height = grid_size
+    corners = [(0, 0), (width - 1, height - 1), (0, height - 1), (width - 1, 0)]
+    colors = ["red", "blue", "green", "yellow"]
+    players = [(corners[i], colors[i]) for i in range(min(count, 4))]
+    free_cells = (cell for cell in ((x, y) for y in range(height) for x in range(width))
+                  if cell not in corners and sum(cell) % 2 == 0)
+    players += [(next(free_cells), "black") for _ in range(count - len(players))]
+    return players
+
+
+def step_simulation(grid_size, players, rule, number, min_walkers=2):
+    # number simulation steps, starting a fresh game whenever one is over or has merged down to fewer
+    # than min_walkers walkers
+    simulation = WanderingSimulation(grid_size, players, rule=rule, seed=0)
+    for seed in range(number):
+        if simulation.is_finished() or len(simulation.get_positions()) < min_walkers:
+            simulation = WanderingSimulation(grid_size, players, rule=rule, seed=seed)
+        simulation.step()
+
+
+@benchmark("simulation_step_k2_7x7", number=20000)
+def bench_step_k2(number):
+    step_simulation((7, 7), corner_players((7, 7), 2), RULE_MEET, number)
+
+
+@benchmark("simulation_step_3to5_15x15_4_players", number=20000)
+def bench_step_3to5(number):
+    step_simulation((15, 15), corner_players((15, 15), 4), RULE_MERGE, number)
+
+
+# Collision check and merge cost as the number of players grows. Games restart once half of their
+# walkers have merged, so every step is taken with more than half of the players still on the board.
+def register_player_count_benchmark(count):
+    @benchmark(f"simulation_step_merge_15x15_{count}_players", number=max(1000, 40000 // count))
+    def bench_player_count(number):
+        step_simulation((15, 15), corner_players((15, 15), count), RULE_MERGE, number, min_walkers=count // 2 + 1)
+
+
+for player_count in (2, 4, 8, 14):
+    register_player_count_benchmark(player_count)
+
+
+@benchmark("batch_games_15x15_4_players", number=10000)
+def bench_batch(number):
+    run_batch((15, 15), [position for position, _ in corner_players((15, 15), 4)], number, seed=0)
+
+
+def register_grid_benchmark(size):
+    @benchmark(f"gui_draw_grid_{size}x{size}", number=20, needs_display=True)
+    def bench_draw_grid(number):
+        root = tk.Tk()
+        try:
+            cell_size = max(1, min(50, 800 // size))
+            canvas = tk.Canvas(root, width=size * cell_size, height=size * cell_size)
+            canvas.pack()
+            for _ in range(number):
+                canvas.delete("all")
+                draw_grid(canvas, (size, size), cell_size)
+                root.update_idletasks()  # Let Tk actually draw the new items
+        finally:
+            root.destroy()
+
+
+for grid_size in (15, 150):
+    register_grid_benchmark(grid_size)
+
+
+# Cost of one frame: move every avatar on the canvas and let Tk redraw
+def register_frame_benchmark(count):
+    @benchmark(f"gui_frame_15x15_{count}_players", number=200, needs_display=True)
+    def bench_frame(number):
+        topology = get_topology(15, 15)
+        rng = random.Random(0)
+        root = tk.Tk()
+        try:
+            canvas = tk.Canvas(root, width=15 * 50, height=15 * 50)
+            canvas.pack()
+            renderer = BoardRenderer(canvas, 50)
+            start_positions = corner_players((15, 15), count)
+            for walker_id, (position, color) in enumerate(start_positions):
+                renderer.add_walker(walker_id, color, position)
+            cells = [topology.cell_of(position) for position, _ in start_positions]
+            root.update()
+            for _ in range(number):
+                for walker_id in range(count):
+                    cells[walker_id] = topology.random_neighbor(cells[walker_id], rng)
+                    renderer.move_walker(walker_id, topology.position_of(cells[walker_id]))
+                renderer.flush()
+                root.update_idletasks()
+        finally:
+            root.destroy()
+
+
+for player_count in (4, 16, 64):
+    register_frame_benchmark(player_count)
+
+
+def has_display():
+    try:
+        tk.Tk().destroy()
+        return True
+    except tk.TclError:
+        return False
+
+
+def run_benchmark(bench, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bench.function(bench.number)
+        timings.append(time.perf_counter() - start)
+    # The fastest run is the least disturbed by other processes, so rates are based on it
+    return {
+        "number": bench.number,
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "ops_per_second": bench.number / min(timings),
+    }
+
+
+def run_all(name_filter=None, repeat=5, report=print):
+    display = has_display()
+    results = {}
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.name:
+            continue
+        if bench.needs_display and not display:
+            report(f"{bench.name:45} skipped (no display, try xvfb-run)")
+            continue
+        results[bench.name] = run_benchmark(bench, repeat)
+        report(f"{bench.name:45} {results[bench.name]['ops_per_second']:14.1f} ops/s")
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "display": display,
+        "benchmarks": results,
+    }
+
+
+# Names of the benchmarks that got slower than the baseline by more than tolerance, or that are in the
+# baseline but did not run this time (e.g. the GUI benchmarks without a display). Benchmarks left out
+# by name_filter are not missing.
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, report=print, name_filter=None):
+    regressions = []
+    for name in baseline["benchmarks"]:
+        if name not in results["benchmarks"] and not (name_filter and name_filter not in name):
+            report(f"{name:45} {'':>8}  MISSING")
+            regressions.append(name)
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        baseline_ops = baseline["benchmarks"][name]["ops_per_second"]
+        change = result["ops_per_second"] / baseline_ops - 1
+        status = "ok"
+        if change < -tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        report(f"{name:45} {change:+8.1%}  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the simulation hot path and the GUI frame cost.")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --output")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.filter, args.repeat)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print()
+        regressions = compare(results, baseline, args.tolerance, name_filter=args.filter)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed or did not run: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
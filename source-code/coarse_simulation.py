@@ -0,0 +1,175 @@
+import argparse
+import random
+from functools import lru_cache
+import numpy as np
+from scipy import stats
+from scipy.spatial import cKDTree
+from simulation import WanderingSimulation, RULES, RULE_MERGE
+
+# Jumps shorter than this many steps are not worth the bookkeeping; the game takes single steps instead.
+MIN_JUMP = 8
+VALIDATION_GAMES = 2000
+VALIDATION_SIGNIFICANCE = 0.001  # p-value below which validate() reports the engines as different
+
+
+# Distance from every cell (row by row) to the nearest cell a walker cannot enter: a blocked cell, or the
+# outside of the grid unless its edges wrap. A walker further than k from every such cell moves like on an
+# endless grid for its next k steps, whatever path it takes.
+@lru_cache(maxsize=8)
+def wall_distances(topology):
+    width, height, wrap = topology.width, topology.height, topology.wrap
+    distance = np.full((height, width), width + height + 2, dtype=np.int64)
+    for x, y in topology.blocked:
+        distance[y, x] = 0
+    if not wrap:
+        xs, ys = np.arange(width), np.arange(height)
+        distance = np.minimum(distance, np.minimum(np.minimum(xs + 1, width - xs)[None, :],
+                                                   np.minimum(ys + 1, height - ys)[:, None]))
+    # L1 distance transform: one pass each way along the rows, then along the columns. Wrapped edges
+    # need a second lap so distances can carry over the seam.
+    laps = 2 if wrap else 1
+    for axis, length in ((1, width), (0, height)):
+        distance = np.moveaxis(distance, axis, 0)
+        for index in range(1, laps * length):
+            current, previous = index % length, (index - 1) % length
+            np.minimum(distance[current], distance[previous] + 1, out=distance[current])
+        for index in range(laps * length - 2, -1, -1):
+            current, following = index % length, (index + 1) % length
+            np.minimum(distance[current], distance[following] + 1, out=distance[current])
+        distance = np.moveaxis(distance, 0, axis)
+    return distance.ravel()
+
+
+class CoarseSkipper:
+    # Plays a simulation many steps at a time while its walkers are far apart. Two walkers at L1 distance d
+    # cannot meet within (d - 1) // 2 steps, so all walkers jump that far at once and single steps are
+    # only taken when some walkers are close. Blocked cells only make paths longer, so the bound holds on maps.
+    # Away from walls each step changes x + y and x - y by +1 or -1, independently and uniformly, so a jump
+    # of k steps draws two binomials instead of k moves. Walkers near a wall jump in shorter pieces
+    # that cannot reach it, and take single steps close to it. The final positions follow exactly the distribution of single steps.
+    def __init__(self, simulation, rng=None, min_jump=MIN_JUMP):
+        self.__simulation = simulation
+        if rng is None:
+            rng = np.random.default_rng(simulation.get_seed())  # Replaying a seeded game skips the same way
+        self.__rng = rng
+        self.__step_rng = random.Random(int(self.__rng.integers(1 << 63)))  # For the single steps near walls
+        self.__min_jump = min_jump
+        topology = simulation.get_topology()
+        self.__topology = topology
+        self.__walls = wall_distances(topology)
+
+    def get_simulation(self):
+        return self.__simulation
+
+    # L1 distance between the two closest walkers, around the wrapped edges if they wrap.
+    def __closest_distance(self, cells):
+        if len(cells) < 2:
+            return 0
+        topology = self.__topology
+        points = np.column_stack((cells % topology.width, cells // topology.width))
+        box = (topology.width, topology.height) if topology.wrap else None
+        distances, _ = cKDTree(points, boxsize=box).query(points, k=2, p=1)
+        return int(distances[:, 1].min())
+
+    # Cells reached from cells after counts steps each, all of them further than counts from any wall.
+    def __free_moves(self, cells, counts):
+        topology = self.__topology
+        width, height = topology.width, topology.height
+        u = 2 * self.__rng.binomial(counts, 0.5) - counts
+        v = 2 * self.__rng.binomial(counts, 0.5) - counts
+        x = cells % width + (u + v) // 2
+        y = cells // width + (u - v) // 2
+        if topology.wrap:
+            x, y = x % width, y % height
+        return y * width + x
+
+    # Cell reached from cell after steps steps, near a wall: in pieces too short to reach it, and single
+    # steps right next to it.
+    def __walk_near_wall(self, cell, steps):
+        topology = self.__topology
+        walls = self.__walls
+        while steps:
+            free = min(int(walls[cell]) - 1, steps)
+            if free >= MIN_JUMP:
+                cell = int(self.__free_moves(np.int64(cell), free))
+                steps -= free
+            else:
+                cell = topology.random_neighbor(cell, self.__step_rng)
+                steps -= 1
+        return cell
+
+    def __jump(self, cells, steps):
+        near = self.__walls[cells] <= steps
+        moved = self.__free_moves(cells, np.full(cells.size, steps, dtype=np.int64))
+        for index in np.flatnonzero(near):
+            moved[index] = self.__walk_near_wall(int(cells[index]), steps)
+        return moved
+
+    # Step until target_step is reached or the game is over, like WanderingSimulation.fast_forward().
+    def fast_forward(self, target_step):
+        simulation = self.__simulation
+        if not simulation.can_skip_steps() or any(walker.get_strategy() is not None for walker in simulation.get_walkers()):
+            return simulation.fast_forward(target_step)  # Every step has to be taken, or moves are not uniform
+        while not simulation.is_finished() and simulation.get_step_count() < target_step:
+            cells = np.array([walker.get_cell() for walker in simulation.get_walkers()], dtype=np.int64)
+            distance = self.__closest_distance(cells)
+            steps = min((distance - 1) // 2, target_step - simulation.get_step_count())
+            if steps >= self.__min_jump:
+                simulation.skip_steps(steps, self.__jump(cells, steps).tolist())
+                continue
+            # The distance grows by at most 2 per step, so no jump is possible before it could have
+            # grown back to 2 * min_jump + 1
+            single_steps = max(1, (2 * self.__min_jump + 2 - distance) // 2)
+            simulation.fast_forward(min(simulation.get_step_count() + single_steps, target_step))
+        return simulation.get_step_count()
+
+    # Run until the game is over, or until max_steps more steps were taken. Returns the step count.
+    def run(self, max_steps=None):
+        simulation = self.__simulation
+        target = simulation.get_step_count() + max_steps if max_steps is not None else float("inf")
+        return self.fast_forward(target)
+
+
+# Play num_games games step by step and as many with CoarseSkipper, and compare their lengths with a
+# two-sample Kolmogorov-Smirnov test. Both engines follow the same move rules if the p-value is not tiny.
+def validate(grid_size, start_positions, num_games=VALIDATION_GAMES, rule=RULE_MERGE, seed=0, topology=None, max_steps=None):
+    players = [(tuple(position), "black") for position in start_positions]
+    seeds = np.random.SeedSequence(seed).generate_state(2 * num_games, dtype=np.uint64)
+    step_lengths, coarse_lengths = [], []
+    for game in range(num_games):
+        simulation = WanderingSimulation(grid_size, players, rule=rule, seed=int(seeds[2 * game]), topology=topology)
+        step_lengths.append(simulation.run(max_steps))
+        simulation = WanderingSimulation(grid_size, players, rule=rule, seed=int(seeds[2 * game + 1]), topology=topology)
+        coarse_lengths.append(CoarseSkipper(simulation, np.random.default_rng(seeds[2 * game + 1])).run(max_steps))
+    test = stats.ks_2samp(step_lengths, coarse_lengths)
+    return {
+        "games": num_games,
+        "step_mean": float(np.mean(step_lengths)),
+        "coarse_mean": float(np.mean(coarse_lengths)),
+        "ks_statistic": float(test.statistic),
+        "p_value": float(test.pvalue),
+        "same": bool(test.pvalue >= VALIDATION_SIGNIFICANCE),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the coarse engine plays games like single steps do.")
+    parser.add_argument("--grid", type=int, nargs=2, default=(30, 30), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--start", type=int, nargs=2, action="append", metavar=("X", "Y"),
+                        help="start position of a player, repeat for every player (default: two opposite corners)")
+    parser.add_argument("--rule", choices=RULES, default=RULE_MERGE)
+    parser.add_argument("--games", type=int, default=VALIDATION_GAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    width, height = args.grid
+    starts = args.start or [(0, 0), (width - 1, height - 1)]
+    result = validate((width, height), starts, args.games, args.rule, args.seed)
+    print(f"Mean game length: {result['step_mean']:.1f} step by step, {result['coarse_mean']:.1f} coarse")
+    print(f"Kolmogorov-Smirnov statistic {result['ks_statistic']:.4f}, p-value {result['p_value']:.4f}")
+    print("Same distribution" if result["same"] else "The engines differ")
+    return 0 if result["same"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
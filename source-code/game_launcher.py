@@ -1,25 +1,40 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # Taken before the other imports, so --measure-startup includes them
+
+import argparse
+import importlib
+import sys
 import tkinter as tk
 from tkinter import messagebox
-from level_3_5 import WanderingGame3to5Launcher
-from level_k_2 import WanderingGameKto2Launcher
+from audio import MUSIC_FILE
+from profiler import TickProfiler, DEFAULT_PROFILE_PATH
+from session import GameSession
 
 class GameLauncher:
     def __init__(self):
         # Mapping display names to internal level identifiers
         self.__level_map = {
             "Kindergarten to Grade 2": "K-2",
-            "Grade 3 to Grade 5": "3-5"
+            "Grade 3 to Grade 5": "3-5",
+            "Classroom: Many Boards": "Classroom"
         }
+        # Level modules are only imported once their level is chosen, so their dependencies do not delay the
+        # selection window and a level that is not played is never loaded
         self.__level_to_game_launcher = {
-            "K-2": WanderingGameKto2Launcher(),
-            "3-5": WanderingGame3to5Launcher()
+            "K-2": ("level_k_2", "WanderingGameKto2Launcher"),
+            "3-5": ("level_3_5", "WanderingGame3to5Launcher"),
+            "Classroom": ("multi_board", "MultiBoardLauncher")
         }
 
+    def __create_game_launcher(self, internal_value):
+        module_name, class_name = self.__level_to_game_launcher[internal_value]
+        return getattr(importlib.import_module(module_name), class_name)()
+
     # Handle the selection of the game level.
-    def handle_start_button_click(self, display_value, root):
-        root.destroy()  # Close the selection window
+    def handle_start_button_click(self, display_value, session):
+        session.clear()  # Replace the selection screen with the level, in the same window
         internal_value = self.__level_map[display_value]
-        self.__level_to_game_launcher[internal_value].launch_game()
+        self.__create_game_launcher(internal_value).launch_game(session)
 
     # Display game rules in a message box.
     def show_rules(self):
@@ -32,14 +47,25 @@ class GameLauncher:
             "- The grid can be rectangular.\n"
             "- Players can start anywhere on the grid.\n"
             "- The number of players can be between 2 and 4.\n"
-            "- Players wander randomly until they all meet."
+            "- Players wander randomly until they all meet.\n\n"
+            "Classroom Mode:\n"
+            "- 16 to 64 games of either level run side by side.\n"
+            "- Every board shows its number of moves when it is done."
         )
         messagebox.showinfo("Game Rules", rules)
 
-    # Main function to launch the game.
-    def launch_game(self):
-        # Initialize main window
-        root = tk.Tk()
+    # Main function to launch the game. With measure_startup the window is closed as soon as it is drawn
+    # and the time since the launcher started is printed.
+    # With profile_path the phases of every tick are timed and written to that file on exit.
+    def launch_game(self, measure_startup=False, telemetry_path=None, profile_path=None):
+        # Initialize main window, shared by every screen of the game
+        telemetry = None
+        if telemetry_path is not None:
+            from telemetry import TelemetryRecorder, open_sink  # Only loaded when telemetry is asked for
+            telemetry = TelemetryRecorder(open_sink(telemetry_path))
+        profiler = TickProfiler(profile_path) if profile_path is not None else None
+        session = GameSession(telemetry=telemetry, profiler=profiler)
+        root = session.get_root()
         root.title("Select Game Level")
 
         label = tk.Label(root, text="Select the game level:")
@@ -58,11 +84,11 @@ class GameLauncher:
         button_frame.pack(pady=10)
 
         # Button to start the selected game level
-        select_button = tk.Button(button_frame, text="Start Game", command=lambda: self.handle_start_button_click(selected_value.get(), root))
+        select_button = tk.Button(button_frame, text="Start Game", command=lambda: self.handle_start_button_click(selected_value.get(), session))
         select_button.pack(side="left", padx=20)
 
         # Button to quit the game
-        quit_game_button = tk.Button(button_frame, text="Quit Game", command=root.destroy)
+        quit_game_button = tk.Button(button_frame, text="Quit Game", command=session.close)
         quit_game_button.pack(side="left", padx=20)
 
         # Label to show rules; clickable to display rules
@@ -70,8 +96,27 @@ class GameLauncher:
         rules_label.pack(side="bottom", pady=10, padx=20) 
         rules_label.bind("<Button-1>", lambda e: self.show_rules())  # Bind click event to show rules
 
-        root.mainloop()  # Run the main event loop
+        if measure_startup:
+            root.update()  # Draw the window
+            print(f"Time to first window: {(time.perf_counter() - LAUNCH_TIME) * 1000:.1f} ms")
+            print(f"Level modules loaded: {[name for name in ('level_k_2', 'level_3_5', 'multi_board') if name in sys.modules]}")
+            session.close()
+            return
+
+        # Load the K-2 music in the background while the player chooses a level
+        session.after(0, session.load_music, MUSIC_FILE)
+
+        session.mainloop()  # Run the main event loop
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wandering in the Woods")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print the time until the level selection window is drawn, then exit")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="record every step of every game to PATH (.ndjson or .jsonl for JSON lines, binary otherwise)")
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const=DEFAULT_PROFILE_PATH,
+                        help=f"time every phase of every tick, show the percentiles on request and write them to PATH "
+                             f"on exit (default {DEFAULT_PROFILE_PATH})")
+    args = parser.parse_args()
     game_launcher = GameLauncher()
-    game_launcher.launch_game()
+    game_launcher.launch_game(args.measure_startup, args.telemetry, args.profile)
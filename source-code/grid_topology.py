@@ -0,0 +1,181 @@
+from array import array
+from collections import deque
+from functools import lru_cache
+
+# Direction codes stored in move logs, in the order moves are listed for every cell.
+DIRECTIONS = ("up", "down", "left", "right")
+UP, DOWN, LEFT, RIGHT = range(len(DIRECTIONS))
+
+# Characters of map files: one line per row, every other character is an error.
+MAP_OPEN, MAP_BLOCKED = ".", "#"
+MAP_WRAP = "wrap"  # Optional first line of a map file: the edges wrap around like on a torus
+NO_COMPONENT = -1  # Component of blocked cells
+
+
+class GridTopology:
+    # blocked: positions walkers can never enter. wrap: moving off an edge enters the opposite edge.
+    def __init__(self, width, height, blocked=frozenset(), wrap=False):
+        if width < 1 or height < 1 or width * height < 2:
+            raise ValueError("The grid needs at least two cells.")
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.wrap = wrap
+        self.blocked = frozenset(blocked)
+        for x, y in self.blocked:
+            if not (0 <= x < width and 0 <= y < height):
+                raise ValueError(f"Blocked position {(x, y)} is outside the grid.")
+        is_open = [(cell % width, cell // width) not in self.blocked for cell in range(self.num_cells)]
+        self.__components = None  # Reachability index, built on first use
+        self.__colors = None
+        self.__bipartite = None
+
+        # Cells are numbered row by row: cell = y * width + x.
+        # Positions are built once so moving a walker never allocates a new (x, y) tuple.
+        self.positions = [(cell % width, cell // width) for cell in range(self.num_cells)]
+
+        # Neighbors in CSR form: the cells reachable from cell are targets[offsets[cell]:offsets[cell + 1]],
+        # and directions[i] is the direction code of the move to targets[i]
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.directions = array('b')
+        # step_table[cell * 4 + direction] is the cell reached by moving in direction, -1 if the move is invalid
+        self.step_table = array('i', [-1]) * (self.num_cells * len(DIRECTIONS))
+        for cell, (x, y) in enumerate(self.positions):
+            if not is_open[cell]:
+                self.offsets.append(len(self.targets))  # Blocked cells have no moves
+                continue
+            # Each move is valid if it stays on the grid (or wraps around) and does not enter a blocked cell
+            if y > 0 or wrap:
+                self.__add_move(cell, UP, x + (y - 1) % height * width, is_open)
+            if y < height - 1 or wrap:
+                self.__add_move(cell, DOWN, x + (y + 1) % height * width, is_open)
+            if x > 0 or wrap:
+                self.__add_move(cell, LEFT, (x - 1) % width + y * width, is_open)
+            if x < width - 1 or wrap:
+                self.__add_move(cell, RIGHT, (x + 1) % width + y * width, is_open)
+            self.offsets.append(len(self.targets))
+
+    def __add_move(self, cell, direction, target, is_open):
+        if not is_open[target]:
+            return
+        self.targets.append(target)
+        self.directions.append(direction)
+        self.step_table[cell * len(DIRECTIONS) + direction] = target
+
+    def get_size(self):
+        return (self.width, self.height)
+
+    def cell_of(self, position):
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"Position {position} is outside the grid.")
+        if position in self.blocked:
+            raise ValueError(f"Position {position} is blocked.")
+        return y * self.width + x
+
+    def is_blocked(self, position):
+        return position in self.blocked
+
+    def position_of(self, cell):
+        return self.positions[cell]
+
+    def degree(self, cell):
+        return self.offsets[cell + 1] - self.offsets[cell]
+
+    def neighbors(self, cell):
+        return self.targets[self.offsets[cell]:self.offsets[cell + 1]]
+
+    # Cell reached by moving from cell in direction; raises ValueError if the move leaves the grid.
+    def move(self, cell, direction):
+        target = self.step_table[cell * len(DIRECTIONS) + direction]
+        if target < 0:
+            raise ValueError(f"Cannot move {DIRECTIONS[direction]} from {self.positions[cell]}.")
+        return target
+
+    # Label the connected components with one breadth-first search over the whole grid, and 2-color each one.
+    # A walker's color flips at every step, so walkers on a 2-colorable (bipartite) component can only meet
+    # if they start on the same color; on the open rectangle this is the checkerboard parity.
+    def __build_reachability(self):
+        components = array('i', [NO_COMPONENT]) * self.num_cells
+        colors = array('b', [0]) * self.num_cells
+        bipartite = []
+        offsets, targets = self.offsets, self.targets
+        for start in range(self.num_cells):
+            if components[start] != NO_COMPONENT or self.positions[start] in self.blocked:
+                continue
+            component = len(bipartite)
+            components[start] = component
+            is_bipartite = True
+            queue = deque([start])
+            while queue:
+                cell = queue.popleft()
+                for target in targets[offsets[cell]:offsets[cell + 1]]:
+                    if components[target] == NO_COMPONENT:
+                        components[target] = component
+                        colors[target] = 1 - colors[cell]
+                        queue.append(target)
+                    elif colors[target] == colors[cell]:
+                        is_bipartite = False
+            bipartite.append(is_bipartite)
+        self.__components, self.__colors, self.__bipartite = components, colors, bipartite
+
+    def component_of(self, cell):
+        if self.__components is None:
+            self.__build_reachability()
+        return self.__components[cell]
+
+    # True if walkers starting on cells can all end up on one cell: they share a component, and
+    # a color unless the component has odd cycles. A walker on a cell without moves meets nobody.
+    def can_meet(self, cells):
+        if self.__components is None:
+            self.__build_reachability()
+        cells = list(cells)
+        if any(self.degree(cell) == 0 for cell in cells):
+            return False
+        component = self.__components[cells[0]]
+        if any(self.__components[cell] != component for cell in cells):
+            return False
+        return not self.__bipartite[component] or len({self.__colors[cell] for cell in cells}) == 1
+
+    # Cells walkers starting on cell could meet on: its component, restricted to its color if bipartite.
+    def meeting_cells(self, cell):
+        if self.__components is None:
+            self.__build_reachability()
+        component, color = self.__components[cell], self.__colors[cell]
+        same_color = self.__bipartite[component]
+        return [other for other in range(self.num_cells) if self.__components[other] == component
+                and self.degree(other) > 0 and (not same_color or self.__colors[other] == color)]
+
+    # Pick one of the cell's neighbors uniformly: a random offset into the cell's slice of targets.
+    def random_neighbor(self, cell, rng):
+        start = self.offsets[cell]
+        return self.targets[start + int(rng.random() * (self.offsets[cell + 1] - start))]
+
+
+# Topologies never change, so one instance per grid is shared by every game.
+@lru_cache(maxsize=None)
+def get_topology(width, height, blocked=frozenset(), wrap=False):
+    return GridTopology(width, height, frozenset(blocked), wrap)
+
+
+# Topology described by a map file: one line per row, MAP_OPEN for open cells and MAP_BLOCKED for blocked ones,
+# optionally preceded by a MAP_WRAP line.
+def load_map(path):
+    with open(path) as map_file:
+        lines = [line.rstrip("\r\n") for line in map_file if line.strip()]
+    wrap = bool(lines) and lines[0].strip().lower() == MAP_WRAP
+    rows = lines[1:] if wrap else lines
+    if not rows:
+        raise ValueError(f"The map {path} has no rows.")
+    width = len(rows[0])
+    blocked = set()
+    for y, row in enumerate(rows):
+        if len(row) != width:
+            raise ValueError(f"Row {y + 1} of the map {path} has {len(row)} cells instead of {width}.")
+        for x, char in enumerate(row):
+            if char == MAP_BLOCKED:
+                blocked.add((x, y))
+            elif char != MAP_OPEN:
+                raise ValueError(f"Unknown character {char!r} in row {y + 1} of the map {path}.")
+    return get_topology(width, len(rows), frozenset(blocked), wrap)
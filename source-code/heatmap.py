@@ -0,0 +1,127 @@
+import tkinter as tk
+from array import array
+from itertools import islice
+from renderer import FRAME_INTERVAL, GRID_TAG, MIN_GRID_CELL_SIZE
+
+# Colors of cells visited 1, 2-3, 4-7, ... times; the last one for every count beyond.
+HEAT_COLORS = ("#fff7bc", "#fee391", "#fec44f", "#fe9929", "#ec7014", "#cc4c02", "#993404", "#662506")
+HEATMAP_TAG = "heatmap"
+# Cells redrawn per frame at most; the rest wait for the next frames, so crowded large grids stay smooth.
+MAX_CELL_WRITES = 4000
+
+
+class HeatmapLayer:
+    # How often the walkers visited every cell, drawn as one image under the walkers. A cell's color only
+    # depends on the highest bit of its count, so a frame rewrites only the cells that reached a new
+    # power of two since the last one. Visits are counted from the start of the game, whether the heatmap
+    # is shown or not, so it can be looked at once the game is over. While it is hidden, steps skipped to
+    # the end of the game are not counted, so skipping can still jump ahead; while it is shown they are,
+    # and skipping goes step by step.
+    def __init__(self, root, canvas, cell_size, frame_interval=FRAME_INTERVAL):
+        self.__root = root  # Schedules the frames: the Tk root or a GameSession
+        self.__canvas = canvas
+        self.__cell_size = cell_size
+        self.__frame_interval = frame_interval
+        self.__simulation = None
+        self.__width = 0
+        self.__counts = array('I')  # Visits of every cell, row by row
+        self.__dirty = {}           # Cells whose color changed since the last frame, oldest first
+        self.__image = None
+        self.__item = None
+        self.__shown = False
+        self.__frame_job = None
+        self.__button = None
+
+    # Count the visits of a new game, from its start positions on.
+    def attach(self, simulation):
+        if self.__simulation is not None:
+            self.__simulation.unsubscribe(self.__on_step)
+        self.__simulation = simulation
+        width, height = simulation.get_grid_size()
+        self.__width = width
+        self.__counts = array('I', bytes(4 * width * height))
+        self.__dirty.clear()
+        size = (width * self.__cell_size, height * self.__cell_size)
+        if self.__image is None or (self.__image.width(), self.__image.height()) != size:
+            self.__canvas.delete(HEATMAP_TAG)
+            self.__image = tk.PhotoImage(master=self.__canvas, width=size[0], height=size[1])
+            self.__item = self.__canvas.create_image(0, 0, anchor=tk.NW, image=self.__image, tags=HEATMAP_TAG,
+                                                     state="normal" if self.__shown else "hidden")
+        else:
+            self.__image.blank()  # Unvisited cells are transparent
+        # Above the grid, which may be an opaque image, and below everything else
+        self.__canvas.tag_lower(HEATMAP_TAG)
+        self.__canvas.tag_lower(GRID_TAG)
+        simulation.subscribe(self.__on_step, recorder=self.__shown)
+        for x, y in simulation.get_positions():
+            self.__visit(y * width + x)
+
+    def get_count(self, position):
+        x, y = position
+        return self.__counts[y * self.__width + x]
+
+    def __visit(self, cell):
+        count = self.__counts[cell] + 1
+        self.__counts[cell] = count
+        if count & (count - 1) == 0:
+            self.__dirty[cell] = None  # Reached a power of two: the next color
+
+    def __on_step(self, event):
+        counts, dirty, width = self.__counts, self.__dirty, self.__width
+        for _, _, (x, y) in event.moves:
+            cell = y * width + x
+            count = counts[cell] + 1
+            counts[cell] = count
+            if count & (count - 1) == 0:
+                dirty[cell] = None
+
+    # Tcl commands painting the cells whose color changed, at most MAX_CELL_WRITES of them. They count as drawn.
+    def frame_commands(self):
+        if not self.__dirty:
+            return []
+        image, size, width = str(self.__image), self.__cell_size, self.__width
+        inset = 1 if size >= MIN_GRID_CELL_SIZE else 0  # Keep the grid lines visible
+        last_color = len(HEAT_COLORS) - 1
+        commands = []
+        dirty = self.__dirty
+        for cell in list(islice(dirty, MAX_CELL_WRITES)):
+            del dirty[cell]
+            y, x = divmod(cell, width)
+            color = HEAT_COLORS[min(last_color, self.__counts[cell].bit_length() - 1)]
+            commands.append("%s put %s -to %d %d %d %d" % (image, color, x * size + inset, y * size + inset,
+                                                           (x + 1) * size, (y + 1) * size))
+        return commands
+
+    def flush(self):
+        commands = self.frame_commands()
+        if commands:
+            self.__canvas.tk.eval("\n".join(commands))
+
+    def __frame(self):
+        self.flush()
+        self.__frame_job = self.__root.after(self.__frame_interval, self.__frame)
+
+    def is_shown(self):
+        return self.__shown
+
+    # Show or hide the heatmap. Hidden, it stops drawing and no longer counts the skipped steps.
+    def toggle(self):
+        self.__shown = not self.__shown
+        if self.__simulation is not None:
+            self.__simulation.unsubscribe(self.__on_step)
+            self.__simulation.subscribe(self.__on_step, recorder=self.__shown)
+        if self.__shown:
+            self.__frame_job = self.__root.after(self.__frame_interval, self.__frame)
+        elif self.__frame_job is not None:
+            self.__root.after_cancel(self.__frame_job)
+            self.__frame_job = None
+        if self.__item is not None:
+            self.__canvas.itemconfig(self.__item, state="normal" if self.__shown else "hidden")
+        if self.__button is not None:
+            self.__button.config(text="Hide Heatmap" if self.__shown else "Show Heatmap")
+
+    # Add the "Show Heatmap" button to parent, e.g. the speed controls.
+    def create_toggle(self, parent):
+        self.__button = tk.Button(parent, text="Show Heatmap", command=self.toggle)
+        self.__button.pack(side=tk.LEFT, padx=(0, 10))
+        return self.__button
@@ -2,121 +2,93 @@ import tkinter as tk
 from tkinter import messagebox
 import random
 from abstract_classes import AbstractWanderingGame, AbstractGameLauncher
-
-class Player:
-    def __init__(self, canvas, color, grid_size, start_position):
-        # Creating Private Variables by adding double underscore at the beginning.
-        self.__canvas = canvas  # Canvas where the player will be drawn
-        self.__color = color    # Color of the player's avatar
-        self.__grid_size = grid_size  # Size of the grid (width, height)
-        self.__position = start_position  # Starting position of the player (x, y)
-        self.__size = 50  # Size of each cell in the grid
-        self.__avatar = self.create_avatar()  # Create the player's visual representation on the canvas
-
-    def create_avatar(self):
-        # Create an oval on the canvas to represent the player
-        x, y = self.__position 
-        return self.__canvas.create_oval(
-            x * self.__size, y * self.__size,  # Top-left corner
-            (x + 1) * self.__size, (y + 1) * self.__size,  # Bottom-right corner
-            fill=self.__color,  # Fill color of the oval
-            outline="black"  # Border color of the oval
-        )
-
-    def get_valid_moves(self):
-        # Determine which moves are valid based on the player's position
-        x, y = self.__position
-        valid_moves = []
-
-        if y > 0:  # Can move up if not on the top edge
-            valid_moves.append('up')
-        if y < self.__grid_size[1] - 1:  # Can move down if not on the bottom edge
-            valid_moves.append('down')
-        if x > 0:  # Can move left if not on the left edge
-            valid_moves.append('left')
-        if x < self.__grid_size[0] - 1:  # Can move right if not on the right edge
-            valid_moves.append('right')
-
-        return valid_moves
-
-    def move(self):
-        # Move the player in a random valid direction
-        valid_moves = self.get_valid_moves()  # Get possible moves
-        direction = random.choice(valid_moves)  # Choose a random direction
-        x, y = self.__position
-
-        # Update position based on the chosen direction
-        if direction == 'up':
-            y -= 1
-        elif direction == 'down':
-            y += 1
-        elif direction == 'left':
-            x -= 1
-        elif direction == 'right':
-            x += 1
-
-        self.__position = (x, y)  # Update player's position
-        # Update the player's visual representation on the canvas
-        self.__canvas.coords(
-            self.__avatar,
-            x * self.__size, y * self.__size,  # Top-left corner of the updated position
-            (x + 1) * self.__size, (y + 1) * self.__size  # Bottom-right corner of the updated position
-        )
-    
-    def get_position(self):
-        return self.__position
-    
-    def get_avatar(self):
-        return self.__avatar
+from coarse_simulation import CoarseSkipper
+from grid_topology import get_topology, load_map
+from simulation import WanderingSimulation, RULE_MERGE, RULE_MERGE_ALL, generate_color
+from markov_solver import get_solver
+from outcome_cache import canonical_config, get_outcome_cache
+from renderer import BoardRenderer, draw_grid
+from session import GameSession
+from heatmap import HeatmapLayer
+from profiler import add_profiler_overlay
+from scheduler import GameScheduler, create_speed_controls
+
+# Largest canvas side in pixels; cells shrink below 50 pixels to fit large grids.
+MAX_CANVAS_SIZE = 800
+
+# Limits of the normal mode and of the large grid mode, where start positions are random. Large grids
+# get at least one pixel per cell, so they are at most MAX_CANVAS_SIZE cells wide.
+MAX_GRID_SIZE, MAX_PLAYERS = 15, 4
+MAX_LARGE_GRID_SIZE, MAX_LARGE_PLAYERS = MAX_CANVAS_SIZE, 10000
+
+# Milliseconds between two looks at the prediction cache while a prediction is being computed.
+PREDICTION_POLL_INTERVAL = 200
+
+# Names of the statistics the session keeps over every 3-5 game.
+GAME_STATISTICS = "3-5 moves per game"
+RUN_STATISTICS = "3-5 runs"
 
 class WanderingGame(AbstractWanderingGame):
-    def __init__(self, root, grid_size, players):
-        self.__root = root  # Main window
+    def __init__(self, session, grid_size, players, seed=None, rule=RULE_MERGE, topology=None):
+        self.__session = session  # Owns the main window, shared by every screen and replay
+        self.__root = session.get_root()  # Main window
         self.__grid_size = grid_size  # Size of the grid (width, height)
-        self.__canvas = tk.Canvas(root, width=grid_size[0] * 50, height=grid_size[1] * 50)  # Drawing area
+        # Blocked cells and wrapped edges, if any; the open rectangle otherwise
+        self.__topology = topology if topology is not None else get_topology(*grid_size)
+        self.__rule = rule  # RULE_MERGE_ALL for large grids with many players
+        self.__cell_size = max(1, min(50, MAX_CANVAS_SIZE // max(grid_size)))  # Size of each cell in pixels
+        self.__canvas = tk.Canvas(self.__root, width=grid_size[0] * self.__cell_size, height=grid_size[1] * self.__cell_size)  # Drawing area
         self.__canvas.pack()
         self.__root.title('Wandering Game')  # Window title
 
         self.__root.resizable(False, False)  # Prevent resizing
 
         self.__initial_players = players  # Store initial player info
-        self.__merge_count = 0  # Track number of merges
+        self.__seed = seed  # Seed of the game's random moves, None for a fresh game
+        # Players are drawn by the renderer; the scheduler steps the game and tells the renderer when to draw
+        self.__renderer = BoardRenderer(self.__canvas, self.__cell_size)
+        self.__scheduler = GameScheduler(self.__session, self.__renderer, profiler=self.__session.get_profiler())
+        controls = create_speed_controls(self.__root, self.__scheduler)
+        controls.pack(pady=5)
+        add_profiler_overlay(self.__session, self.__canvas, controls)  # Only when the session is profiled
+        # Cells the players visited, counted from the start of every game
+        self.__heatmap = HeatmapLayer(self.__session, self.__canvas, self.__cell_size)
+        self.__heatmap.create_toggle(controls)
+        self.__game_over_text = None
+        self.__stats_window = None
         self.__reset_game()  # Initialize the game
-        self.__running = True
-
-        self.__root.after(500, self.run_game)  # Start game loop
 
     def create_grid(self):
         # Draw grid on the canvas
-        for i in range(self.__grid_size[0]):
-            for j in range(self.__grid_size[1]):
-                self.__canvas.create_rectangle(
-                    i * 50, j * 50, (i + 1) * 50, (j + 1) * 50, outline="black"
-                )
+        draw_grid(self.__canvas, self.__grid_size, self.__cell_size, blocked=self.__topology.blocked)
 
+    # Start the game again on the same window and canvas; only the game state is created again
     def __reset_game(self):
-        self.__canvas.delete("all")  # Clear canvas
-        self.create_grid()  # Redraw grid
-        # Create players
-        self.__players = [Player(self.__canvas, color, self.__grid_size, position) for position, color in self.__initial_players]
-        self.__move_counts = []  # Initialize move counts list
-        self.__total_moves = 0  # Initialize total moves counter
-
-    def __check_if_together(self):
-        # Check if all players are in the same position
-        positions = [player.get_position() for player in self.__players]
-        return len(set(positions)) != len(positions)
-
-    def __update_statistics(self):
-        # Add current move count to statistics and reset counter
-        self.__move_counts.append(self.__total_moves)
-        self.__total_moves = 0
+        if self.__stats_window is not None:
+            self.__stats_window.destroy()
+            self.__stats_window = None
+        if self.__game_over_text is not None:
+            self.__canvas.delete(self.__game_over_text)
+            self.__game_over_text = None
+        self.create_grid()  # Draw grid if it is not there yet
+        # The simulation owns the game state, the canvas only mirrors it
+        self.__simulation = WanderingSimulation(self.__grid_size, self.__initial_players, rule=self.__rule,
+                                                seed=self.__seed, topology=self.__topology)
+        self.__renderer.clear()  # Ovals of the previous game are reused
+        for walker in self.__simulation.get_walkers():
+            self.__renderer.add_walker(walker.walker_id, walker.get_color(), walker.get_position())
+        self.__simulation.subscribe(self.__renderer.on_step)
+        self.__heatmap.attach(self.__simulation)
+        self.__session.record(self.__simulation)  # Telemetry, when the session records it
+
+        self.run_game()  # Start game loop
 
     def show_statistics(self):
-        # Calculate statistics
-        longest_run = max(self.__move_counts) if self.__move_counts else 0
-        shortest_run = min(self.__move_counts) if self.__move_counts else 0
-        average_run = sum(self.__move_counts) / len(self.__move_counts) if self.__move_counts else 0
+        # The simulation updated the run statistics at every merge, nothing is recomputed here
+        run_stats = self.__simulation.get_run_statistics()
+        longest_run = run_stats.get_max() or 0
+        shortest_run = run_stats.get_min() or 0
+        average_run = run_stats.get_mean()
 
         # Create and show statistics window
         stats_window = tk.Toplevel(self.__root)
@@ -126,27 +98,43 @@ class WanderingGame(AbstractWanderingGame):
         heading.pack(pady=10)
 
         stats_text = (
-            f"Total Moves: {sum(self.__move_counts)}\n"
+            f"Total Moves: {run_stats.get_total()}\n"
             f"Longest Run Without Meeting: {longest_run}\n"
             f"Shortest Run: {shortest_run}\n"
             f"Average Run: {average_run:.2f}"
         )
 
+        if (len(self.__initial_players) == 2 and not (self.__topology.blocked or self.__topology.wrap)
+                and max(self.__grid_size) <= MAX_GRID_SIZE):
+            # With two players on the open grid the exact expected meeting time is known, show it next to the actual one.
+            # The exact solver grows with the square of the cell count, so large grid mode goes without it.
+            (start1, _), (start2, _) = self.__initial_players
+            expected_run = get_solver(self.__grid_size).expected_meeting_time(start1, start2)
+            stats_text += f"\nExpected Run: {expected_run:.2f}"
+
+        # Every game played since the application started, including replays
+        game_stats = self.__session.get_statistics(GAME_STATISTICS)
+        all_runs = self.__session.get_statistics(RUN_STATISTICS)
+        stats_text += (
+            f"\n\nGames Played: {game_stats.get_count()}\n"
+            f"Average Moves per Game: {game_stats.get_mean():.2f} (fewest {game_stats.get_min()}, most {game_stats.get_max()})\n"
+            f"Median Run of All Games: {all_runs.quantile(0.5):.0f}\n"
+            f"95th Percentile Run: {all_runs.quantile(0.95):.0f}"
+        )
+
         stats_label = tk.Label(stats_window, text=stats_text, font=("Helvetica", 14), justify=tk.LEFT)
         stats_label.pack(padx=20, pady=20)
 
-        def on_close():
-            # Handle window close event
-            self.__stats_window.destroy()
-            self.__close_game()
-
         self.__stats_window = stats_window
-        stats_window.protocol("WM_DELETE_WINDOW", on_close)  # Close game when stats window closes
+        stats_window.protocol("WM_DELETE_WINDOW", self.__close_application)  # Close game when stats window closes
 
         # Add buttons
         replay_button = tk.Button(stats_window, text="Replay with Same Coordinates", command=self.__replay_game)
         replay_button.pack(pady=10)
 
+        replay_same_game_button = tk.Button(stats_window, text="Replay Same Game", command=self.__replay_same_game)
+        replay_same_game_button.pack(pady=10)
+
         new_game_button = tk.Button(stats_window, text="Start New Game", command=self.__start_new_game)
         new_game_button.pack(pady=10)
 
@@ -154,82 +142,47 @@ class WanderingGame(AbstractWanderingGame):
         close_button.pack(pady=10)
 
     def __close_application(self):
-        # Close application and stats window if open
-        if hasattr(self, 'stats_window') and self.__stats_window is not None:
-            self.__stats_window.destroy()
-        self.__close_game()
-
-    def __close_game(self):
-        self.__running = False  # Stop game loop
-        self.__root.destroy()  # Close main window
+        # Close application, the stats window goes with the main window
+        self.__scheduler.stop()  # Stop game loop
+        self.__session.close()
 
     def run_game(self):
-        if not self.__running:
-            return
-
-        # Move all players
-        for player in self.__players:
-            player.move()
-        self.__total_moves += 1  # Increment move counter
-
-        if self.__check_if_together():
-            merged_position = None
-            new_players = []
-            positions = {}
-            # Identify merged position and remaining players
-            for player in self.__players:
-                if player.get_position() in positions:
-                    merged_position = player.get_position()
-                else:
-                    positions[player.get_position()] = player
-
-            for player in self.__players:
-                if player.get_position() == merged_position:
-                    self.__canvas.delete(player.get_avatar())  # Remove merged player avatar
-                else:
-                    new_players.append(player)
-
-            # Add new player with merge color
-            if merged_position:
-                colors = ["purple", "orange", "cyan"]  # Merge colors
-                new_color = colors[self.__merge_count] if self.__merge_count < len(colors) else "black"
-                new_players.append(Player(self.__canvas, new_color, self.__grid_size, merged_position))
-                self.__merge_count += 1
-
-            self.__players = new_players  # Update player list
-
-            self.__update_statistics()  # Update stats
-
-            if len(self.__players) == 1:
-                # Game over
-                self.__canvas.create_text(
-                    self.__grid_size[0] * 25, self.__grid_size[1] * 25,
-                    text="Game Over",
-                    font=("Helvetica", 20, "bold"),
-                    fill="black"
-                )
-                self.__root.after(500, self.show_statistics)  # Show stats after delay
-            else:
-                self.__root.after(500, self.run_game)  # Continue game loop
-        else:
-            self.__root.after(500, self.run_game)  # Continue game loop
+        # Players move every 500 ms at 1x speed, faster when another speed is chosen. Skipping to the end
+        # jumps many steps at once while the players are far apart, unless telemetry or the shown heatmap
+        # records every step.
+        skipper = CoarseSkipper(self.__simulation)
+        self.__scheduler.start(self.__simulation, self.__game_over, fast_forward=skipper.fast_forward)
+
+    def __game_over(self):
+        run_stats = self.__simulation.get_run_statistics()
+        self.__session.get_statistics(GAME_STATISTICS).add(run_stats.get_total())
+        self.__session.get_statistics(RUN_STATISTICS).merge(run_stats)
+        self.__game_over_text = self.__canvas.create_text(
+            self.__grid_size[0] * self.__cell_size // 2, self.__grid_size[1] * self.__cell_size // 2,
+            text="Game Over",
+            font=("Helvetica", 20, "bold"),
+            fill="black"
+        )
+        self.__session.after(500, self.show_statistics)  # Show stats after delay
 
     def __replay_game(self):
-        self.__close_game()  # Close current game
-        game_root = tk.Tk()  # Create new game window
-        game_app = WanderingGame(game_root, self.__grid_size, self.__initial_players)
-        game_root.mainloop()  # Start new game loop
+        self.__seed = None  # Fresh random moves from the same coordinates
+        self.__reset_game()
+
+    def __replay_same_game(self):
+        self.__seed = self.__simulation.get_seed()  # Same seed, so every move happens again exactly as before
+        self.__reset_game()
 
     def __start_new_game(self):
-        self.__close_game()  # Close current game
-        new_game_root = tk.Tk()  # Create new start screen window
-        new_game_app = StartScreen(new_game_root)
-        new_game_root.mainloop()  # Start new game loop
+        self.__scheduler.stop()  # Stop game loop
+        self.__session.clear()  # Remove this game's widgets, the window stays
+        StartScreen(self.__session)
 
 
 class StartScreen:
-    def __init__(self, root):
-        self.__root = root
+    def __init__(self, session):
+        self.__session = session
+        self.__root = session.get_root()
         self.__root.title("3-5 Level")  # Set window title
         self.__root.resizable(False, False)  # Prevent window resizing
         self.__setup_ui()  # Initialize UI components
@@ -260,6 +213,25 @@ class StartScreen:
         self.__players_entry = tk.Entry(self.input_frame, width=10)
         self.__players_entry.pack(side=tk.LEFT, padx=(0, 15))
 
+        # Optional map with blocked cells ('#') and open cells ('.'); its size replaces rows and columns
+        self.__map_frame = tk.Frame(self.__root)
+        self.__map_frame.pack(pady=(0, 5))
+        tk.Label(self.__map_frame, text="Map File (optional):").pack(side=tk.LEFT, padx=(10, 5))
+        self.__map_entry = tk.Entry(self.__map_frame, width=40)
+        self.__map_entry.pack(side=tk.LEFT, padx=(0, 15))
+
+        # Wrap-around edges: walking off one side of the grid enters it on the opposite side
+        self.__wrap = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.__map_frame, variable=self.__wrap, text="Wrap Around Edges").pack(side=tk.LEFT, padx=(0, 10))
+
+        # Large grid mode: bigger limits and random start positions instead of typed coordinates
+        self.__large_mode = tk.BooleanVar(value=False)
+        self.__large_mode_check = tk.Checkbutton(
+            self.__root, variable=self.__large_mode,
+            text=f"Large grid mode (up to {MAX_LARGE_GRID_SIZE}x{MAX_LARGE_GRID_SIZE}, {MAX_LARGE_PLAYERS} players, random start positions)"
+        )
+        self.__large_mode_check.pack(pady=(10, 0))
+
         # Button to proceed to coordinate entry
         self.start_button = tk.Button(self.__root, text="Next", command=self.__get_coordinates)
         self.start_button.pack(pady=20)
@@ -268,33 +240,57 @@ class StartScreen:
     def __get_coordinates(self):
         try:
             # Get and validate user inputs
-            try:
-                self.rows = int(self.rows_entry.get())
-            except ValueError:
-                raise ValueError("Only Numbers are allowed as an Input for rows.")
-            try:
-                self.cols = int(self.cols_entry.get())
-            except ValueError:
-                raise ValueError("Only Numbers are allowed as an Input for columns.")
+            map_path = self.__map_entry.get().strip()
+            if map_path:
+                try:
+                    topology = load_map(map_path)
+                except OSError as e:
+                    raise ValueError(f"The map file could not be read: {e}")
+                self.cols, self.rows = topology.get_size()
+            else:
+                try:
+                    self.rows = int(self.rows_entry.get())
+                except ValueError:
+                    raise ValueError("Only Numbers are allowed as an Input for rows.")
+                try:
+                    self.cols = int(self.cols_entry.get())
+                except ValueError:
+                    raise ValueError("Only Numbers are allowed as an Input for columns.")
             try:
                 self.num_players = int(self.__players_entry.get())
             except ValueError:
                 raise ValueError("Only Numbers are allowed as an Input for number of players.")
             
-            if not (2 <= self.num_players <= 4):
-                raise ValueError("Number of players must be between 2 and 4.")
-            if self.rows < 2 or self.rows > 15:
-                raise ValueError("Number of rows in the grid must be at least 2 and at most 15")
-            if self.cols < 2 or self.cols > 15:
-                raise ValueError("Number of columns in the grid must be at least 2 and must be less than 15.")
-            if self.num_players >= self.rows * self.cols:
+            large_mode = self.__large_mode.get()
+            max_grid_size = MAX_LARGE_GRID_SIZE if large_mode else MAX_GRID_SIZE
+            max_players = MAX_LARGE_PLAYERS if large_mode else MAX_PLAYERS
+            if not (2 <= self.num_players <= max_players):
+                raise ValueError(f"Number of players must be between 2 and {max_players}.")
+            if self.rows < 2 or self.rows > max_grid_size:
+                raise ValueError(f"Number of rows in the grid must be at least 2 and at most {max_grid_size}")
+            if self.cols < 2 or self.cols > max_grid_size:
+                raise ValueError(f"Number of columns in the grid must be at least 2 and at most {max_grid_size}.")
+
+            # The adjacency tables are built once here; the game and every replay share them
+            if map_path:
+                self.__topology = get_topology(self.cols, self.rows, topology.blocked, topology.wrap or self.__wrap.get())
+            else:
+                self.__topology = get_topology(self.cols, self.rows, wrap=self.__wrap.get())
+            open_cells = self.rows * self.cols - len(self.__topology.blocked)
+            if self.num_players >= open_cells:
                 raise ValueError("More players than available grid spaces.")
+            if large_mode and self.num_players > open_cells // 2:
+                raise ValueError("In large grid mode at most half of the grid spaces can hold players.")
+
+            if large_mode:
+                self.__start_large_game()
+                return
 
             self.coordinates = []  # Reset coordinates
-            self.__root.destroy()  # Close the current window
+            self.__session.clear()  # Replace the inputs with the coordinate entry
 
-            # Create new window for player coordinates
-            self.coord_window = tk.Tk()
+            # Player coordinates are entered in the same window
+            self.coord_window = self.__root
             self.coord_window.resizable(False, False)
             self.coord_window.title("Enter Player Coordinates")
 
@@ -304,14 +300,41 @@ class StartScreen:
             for i in range(self.num_players):
                 self.__add_coordinate_input(i + 1, self.__colors[i])
 
+            # How long games from the typed coordinates take, from simulations of the open grid
+            self.__prediction_job = None
+            self.__prediction_label = None
+            if not (self.__topology.blocked or self.__topology.wrap):
+                self.__outcomes = get_outcome_cache()
+                self.__prediction_label = tk.Label(self.coord_window, font=("Helvetica", 12), justify=tk.LEFT)
+                self.__prediction_label.pack(pady=(10, 0), padx=10)
+                self.__update_prediction()
+
             # Button to start the game
             self.finish_button = tk.Button(self.coord_window, text="Start Game", command=self.__start_game)
             self.finish_button.pack(pady=20)
-            self.coord_window.mainloop()
 
         except ValueError as e:
             messagebox.showerror("Invalid Input", str(e))  # Show error message for invalid inputs
 
+    def __start_large_game(self):
+        # Players only meet if they start in one connected area, and on cells of the same checkerboard color
+        # unless the area has odd loops (wrapped edges of odd length), so pick cells where they all can
+        topology = self.__topology
+        first_cell = random.choice([cell for cell in range(topology.num_cells)
+                                    if topology.position_of(cell) not in topology.blocked])
+        meeting_cells = topology.meeting_cells(first_cell)
+        if len(meeting_cells) < self.num_players:
+            raise ValueError(f"No connected area of the map has room for {self.num_players} players.")
+        start_cells = [topology.position_of(cell) for cell in random.sample(meeting_cells, self.num_players)]
+        colors = ["red", "blue", "green", "yellow"]
+        player_positions = [
+            (cell, colors[i] if i < len(colors) else generate_color(i)) for i, cell in enumerate(start_cells)
+        ]
+        self.__session.clear()  # Replace the start screen with the game
+
+        # Every group that forms in a step merges in that step
+        WanderingGame(self.__session, (self.cols, self.rows), player_positions, rule=RULE_MERGE_ALL, topology=topology)
+
     def __add_coordinate_input(self, player_number, color):
         frame = tk.Frame(self.coord_window)
         frame.pack(pady=10, anchor=tk.W)
@@ -330,6 +353,52 @@ class StartScreen:
         color_label.pack(side=tk.RIGHT, padx=(10, 10))
 
         self.coordinates.append((x_entry, y_entry, color))  # Store coordinate inputs
+        for entry in (x_entry, y_entry):
+            entry.bind("<KeyRelease>", self.__update_prediction)
+
+    # Start positions typed so far, None while some are missing, invalid or overlapping.
+    def __typed_positions(self):
+        positions = []
+        for x_entry, y_entry, _ in self.coordinates:
+            try:
+                x, y = int(y_entry.get()) - 1, int(x_entry.get()) - 1  # Swapped, like in __start_game
+            except ValueError:
+                return None
+            if not (0 <= x < self.cols and 0 <= y < self.rows) or (x, y) in positions:
+                return None
+            positions.append((x, y))
+        return positions
+
+    # Show the predicted game length for the typed coordinates. Cached predictions show at once; others are
+    # computed in the background and picked up by polling, so typing never waits for a simulation.
+    def __update_prediction(self, event=None):
+        if self.__prediction_label is None:
+            return
+        if event is None:
+            self.__prediction_job = None
+        positions = self.__typed_positions()
+        if positions is None:
+            self.__prediction_label.config(text="Fill in every player's coordinates to see how long the game may take.")
+            return
+        prediction = self.__outcomes.request(canonical_config((self.cols, self.rows), positions))
+        if prediction is None:
+            self.__prediction_label.config(text="Predicting how long the game may take...")
+            if self.__prediction_job is None:
+                self.__prediction_job = self.__session.after(PREDICTION_POLL_INTERVAL, self.__update_prediction)
+            return
+        if prediction.get("never_meets"):
+            text = "These players start on cells of different checkerboard colors, so they can never all meet."
+        elif "error" in prediction:
+            text = "No prediction is available for these coordinates."
+        elif "finish" not in prediction:
+            text = "The players will most likely wander for a very long time."
+        else:
+            finish = prediction["finish"]
+            text = (f"Predicted: about {finish['mean']:.0f} moves until every player has met\n"
+                    f"Half of the games take {finish['p50']:.0f} moves or fewer, 19 in 20 take {finish['p95']:.0f} or fewer")
+            if len(positions) > 2:
+                text += f"\nThe first two players to meet do so after about {prediction['meeting']['mean']:.0f} moves"
+        self.__prediction_label.config(text=text)
 
     def __start_game(self):
         try:
@@ -343,25 +412,41 @@ class StartScreen:
                     raise ValueError(f"Coordinates for player {i + 1} are out of bounds.")
                 if (x, y) in [pos for pos, _ in player_positions]:
                     raise ValueError(f"Coordinates for player {i + 1} overlap with another player.")
+                if self.__topology.is_blocked((x, y)):
+                    raise ValueError(f"Coordinates for player {i + 1} are on a blocked cell.")
 
                 player_positions.append(((x, y), color))
 
-            self.coord_window.destroy()  # Close the coordinate entry window
+            # One pass over the precomputed reachability index: every player must be able to reach player 1
+            topology = self.__topology
+            first_cell = topology.cell_of(player_positions[0][0])
+            for i, (position, _) in enumerate(player_positions):
+                cell = topology.cell_of(position)
+                if topology.degree(cell) == 0:
+                    raise ValueError(f"Player {i + 1} is walled in and can never move.")
+                if topology.component_of(cell) != topology.component_of(first_cell):
+                    raise ValueError(f"There is no path between player 1 and player {i + 1}, so they can never meet.")
+                if not topology.can_meet([first_cell, cell]):
+                    raise ValueError(f"Player 1 and player {i + 1} start on cells of different checkerboard colors, "
+                                     "so they always miss each other.")
+
+            self.__session.clear()  # Replace the coordinate entry with the game
 
             # Start the game with the grid size and player positions
-            game_root = tk.Tk()
-            game_app = WanderingGame(game_root, (self.cols, self.rows), player_positions)
-            game_root.mainloop()
+            WanderingGame(self.__session, (self.cols, self.rows), player_positions, topology=self.__topology)
 
         except ValueError as e:
             messagebox.showerror("Invalid Input", str(e))  # Show error message for invalid inputs
 
 class WanderingGame3to5Launcher(AbstractGameLauncher):
-    # Method to launch the game.
-    def launch_game(self):
-        root = tk.Tk()
-        app = StartScreen(root)
-        root.mainloop()
+    # Method to launch the game, in the given session if its main loop is already running.
+    def launch_game(self, session=None):
+        if session is not None:
+            StartScreen(session)
+            return
+        session = GameSession()
+        StartScreen(session)
+        session.mainloop()
 
 # Check if this script is run directly and then start the main function.
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+import os
+from functools import lru_cache
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import cg
+from grid_topology import get_topology
+
+# Solved tables are kept here, one file per grid size.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".wandering_in_the_woods", "markov")
+CACHE_VERSION = 1
+
+
+class MeetingTimeSolver:
+    # Exact meeting times of two walkers, from the Markov chain over (cell of walker 1, cell of walker 2).
+    # Both walkers move at every step and meet when they land on the same cell, like in WanderingSimulation.
+    def __init__(self, grid_size, cache_dir=DEFAULT_CACHE_DIR):
+        self.__topology = get_topology(*grid_size)
+        self.__grid_size = grid_size
+        self.__cache_dir = cache_dir
+        self.__expected_times = None
+        self.__transient_matrix = None  # Transposed transition matrix between the not-yet-met states
+        self.__transient_index = None   # Pair state -> row of the transient matrix (-1 if not transient)
+
+    def get_grid_size(self):
+        return self.__grid_size
+
+    def __cache_path(self):
+        width, height = self.__grid_size
+        return os.path.join(self.__cache_dir, f"expected_v{CACHE_VERSION}_{width}x{height}.npy")
+
+    def __build_chain(self):
+        topology = self.__topology
+        num_cells = topology.num_cells
+        offsets = np.frombuffer(topology.offsets, dtype=np.int32)
+        targets = np.frombuffer(topology.targets, dtype=np.int32)
+        degree = np.diff(offsets)
+        rows = np.repeat(np.arange(num_cells), degree)
+        single = sparse.csr_matrix((1.0 / degree[rows], (rows, targets)), shape=(num_cells, num_cells))
+
+        # The pair chain is the Kronecker product of the two walkers' chains: state = cell1 * num_cells + cell2
+        pair = sparse.kron(single, single, format="csr")
+
+        # Walkers on cells of different checkerboard colors never meet, and states where they met are absorbing
+        x = np.array([position[0] for position in topology.positions])
+        y = np.array([position[1] for position in topology.positions])
+        parity = (x + y) % 2
+        cell1, cell2 = np.divmod(np.arange(num_cells * num_cells), num_cells)
+        transient = (cell1 != cell2) & (parity[cell1] == parity[cell2])
+
+        states = np.flatnonzero(transient)
+        self.__transient_index = np.full(num_cells * num_cells, -1, dtype=np.int64)
+        self.__transient_index[states] = np.arange(states.size)
+        # Stationary weight of each pair state, the product of the two cells' degrees
+        weights = (degree[cell1[states]] * degree[cell2[states]]).astype(float)
+        return pair[states][:, states], states, cell1, cell2, parity, weights
+
+    def __solve(self):
+        transient, states, cell1, cell2, parity, weights = self.__build_chain()
+        self.__transient_matrix = transient.T.tocsr()
+
+        # Expected steps t to meet from every transient state: (I - Q) t = 1.
+        # The walk is reversible, so scaling the rows by the stationary weights makes the system symmetric
+        # positive definite and conjugate gradient solves it in a few hundred sparse products. A direct
+        # factorization of the 15x15 system takes over a minute because of fill-in.
+        identity = sparse.identity(states.size, format="csr")
+        system = (sparse.diags(weights) @ (identity - transient)).tocsr()
+        solution, info = cg(system, weights, rtol=1e-12, maxiter=100 * states.size)
+        if info != 0:
+            raise RuntimeError(f"Meeting time solver did not converge for grid {self.__grid_size}.")
+
+        num_cells = self.__topology.num_cells
+        expected = np.where(parity[cell1] == parity[cell2], 0.0, np.inf)
+        expected[states] = solution
+        return expected.reshape(num_cells, num_cells)
+
+    # Expected number of moves until two walkers meet, for every pair of start cells.
+    def get_expected_times(self):
+        if self.__expected_times is not None:
+            return self.__expected_times
+
+        path = self.__cache_path()
+        if os.path.exists(path):
+            try:
+                self.__expected_times = np.load(path)
+                return self.__expected_times
+            except (OSError, ValueError) as e:
+                print(f"Meeting time cache unreadable, solving again: {e}")
+
+        self.__expected_times = self.__solve()
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.__cache_dir, exist_ok=True)
+            with open(temporary_path, "wb") as cache_file:
+                np.save(cache_file, self.__expected_times)
+            os.replace(temporary_path, path)  # Other processes never see a half written file
+        except OSError as e:
+            # The table stays in memory, for this grid size and this run only
+            print(f"Meeting time cache unavailable, the solved table is kept in memory only: {e}")
+        return self.__expected_times
+
+    def expected_meeting_time(self, start1, start2):
+        # Infinite when the walkers can never meet
+        topology = self.__topology
+        return float(self.get_expected_times()[topology.cell_of(start1), topology.cell_of(start2)])
+
+    # probabilities[n] is the chance that the walkers meet after exactly n moves.
+    # Stops once the chance of not having met falls below tolerance, or after max_steps.
+    def hitting_time_distribution(self, start1, start2, max_steps=100000, tolerance=1e-9):
+        topology = self.__topology
+        cell1, cell2 = topology.cell_of(start1), topology.cell_of(start2)
+        if cell1 == cell2:
+            return np.array([1.0])
+        if self.__transient_matrix is None:
+            transient = self.__build_chain()[0]
+            self.__transient_matrix = transient.T.tocsr()
+        state = self.__transient_index[cell1 * topology.num_cells + cell2]
+        if state < 0:
+            raise ValueError("Walkers starting on these cells can never meet.")
+
+        distribution = np.zeros(self.__transient_matrix.shape[0])
+        distribution[state] = 1.0
+        probabilities = [0.0]
+        remaining = 1.0
+        while remaining > tolerance and len(probabilities) <= max_steps:
+            distribution = self.__transient_matrix @ distribution
+            still_apart = distribution.sum()
+            probabilities.append(remaining - still_apart)
+            remaining = still_apart
+        return np.array(probabilities)
+
+
+# One solver per grid size, so the tables are loaded from disk at most once per process.
+@lru_cache(maxsize=None)
+def get_solver(grid_size):
+    return MeetingTimeSolver(tuple(grid_size))
@@ -0,0 +1,58 @@
+import base64
+
+
+class MoveLog:
+    # Direction codes (0-3) packed four to a byte, in the order the walkers moved.
+    def __init__(self, data=b"", length=0):
+        if length > len(data) * 4:
+            raise ValueError("The log is shorter than its length.")
+        self.__data = bytearray(data)
+        self.__length = length  # Number of codes stored
+
+    def __len__(self):
+        return self.__length
+
+    def append(self, code):
+        shift = (self.__length & 3) << 1
+        if shift == 0:
+            self.__data.append(code)
+        else:
+            self.__data[-1] |= code << shift
+        self.__length += 1
+
+    # Append count codes at once; packed holds them two bits each, the first one in the lowest bits.
+    def append_packed(self, packed, count):
+        length = self.__length
+        offset = length & 3
+        remaining = count
+        if offset:
+            self.__data[-1] |= (packed << (offset << 1)) & 0xFF
+            taken = min(4 - offset, count)
+            packed >>= taken << 1
+            remaining -= taken
+        if remaining > 0:
+            self.__data += packed.to_bytes((remaining + 3) >> 2, "little")
+        self.__length = length + count
+
+    def get(self, index):
+        if not 0 <= index < self.__length:
+            raise IndexError("Move log index out of range.")
+        return (self.__data[index >> 2] >> ((index & 3) << 1)) & 3
+
+    def __iter__(self):
+        data = self.__data
+        for index in range(self.__length):
+            yield (data[index >> 2] >> ((index & 3) << 1)) & 3
+
+    def get_size_in_bytes(self):
+        return len(self.__data)
+
+    def to_bytes(self):
+        return bytes(self.__data)
+
+    def to_dict(self):
+        return {"length": self.__length, "data": base64.b64encode(self.__data).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(base64.b64decode(data["data"]), data["length"])
@@ -0,0 +1,316 @@
+import math
+import random
+import tkinter as tk
+from tkinter import messagebox
+from abstract_classes import AbstractWanderingGame, AbstractGameLauncher
+from grid_topology import get_topology
+from renderer import BoardRenderer, draw_grid
+from running_stats import RunningStats
+from profiler import add_profiler_overlay
+from scheduler import GameScheduler, create_speed_controls
+from session import GameSession
+from simulation import WanderingSimulation, RULE_MEET, RULE_MERGE
+import level_k_2
+import level_3_5
+
+# Number of boards a class can watch at once.
+BOARD_COUNTS = (16, 25, 36, 49, 64)
+LEVELS = ("Kindergarten to Grade 2", "Grade 3 to Grade 5")
+MAX_CANVAS_SIZE = 900   # Largest side of the canvas holding every board, in pixels
+TILE_GAP = 8            # Pixels between two boards
+RESULT_TAG = "result"   # Canvas tag of the move counts written over finished boards
+
+# Start corners of the 3-5 boards, in player order, and the players' colors.
+PLAYER_COLORS = ["red", "blue", "green", "yellow"]
+
+
+# Start positions of the players on a grid: one per corner, opposite corners first.
+def corner_positions(grid_size, players):
+    width, height = grid_size
+    corners = [(0, 0), (width - 1, height - 1), (width - 1, 0), (0, height - 1)]
+    return [(corners[i], PLAYER_COLORS[i]) for i in range(players)]
+
+
+class SimulationGroup:
+    # The games of every board, stepped together so one GameScheduler drives all of them. To the scheduler
+    # it looks like a single simulation that is finished once every game is; finished games stop stepping.
+    def __init__(self, simulations, on_game_over):
+        self.__simulations = simulations
+        self.__on_game_over = on_game_over  # Called with the board index as soon as its game is over
+        self.__running = list(range(len(simulations)))
+        self.__step_count = 0
+
+    def step(self):
+        simulations = self.__simulations
+        for index in self.__running:
+            simulations[index].step()
+        self.__step_count += 1
+        self.__collect_finished()
+
+    def __collect_finished(self):
+        simulations = self.__simulations
+        finished = [index for index in self.__running if simulations[index].is_finished()]
+        if finished:
+            self.__running = [index for index in self.__running if not simulations[index].is_finished()]
+            for index in finished:
+                self.__on_game_over(index)
+
+    def fast_forward(self, target_step):
+        for index in self.__running:
+            self.__simulations[index].fast_forward(target_step)
+        self.__step_count = max(simulation.get_step_count() for simulation in self.__simulations)
+        self.__collect_finished()
+        return self.__step_count
+
+    def set_profiler(self, profiler):
+        for simulation in self.__simulations:
+            simulation.set_profiler(profiler)
+
+    def is_finished(self):
+        return not self.__running
+
+    def get_step_count(self):
+        return self.__step_count
+
+    # Walkers of every board, one list per board.
+    def get_walkers(self):
+        return [simulation.get_walkers() for simulation in self.__simulations]
+
+
+class RendererGroup:
+    # The renderers of every board on a shared canvas, drawn with one call into Tcl per frame.
+    def __init__(self, canvas, renderers):
+        self.__canvas = canvas
+        self.__renderers = renderers
+
+    def flush(self):
+        commands = []
+        for renderer in self.__renderers:
+            commands.extend(renderer.frame_commands())
+        if commands:
+            self.__canvas.tk.eval("\n".join(commands))
+
+    def stop(self):
+        self.flush()
+
+    # walkers: one list per board, as returned by SimulationGroup.get_walkers().
+    def sync(self, walkers):
+        for renderer, board_walkers in zip(self.__renderers, walkers):
+            renderer.sync(board_walkers)
+
+
+class MultiBoardGame(AbstractWanderingGame):
+    # num_boards games with the same grid and start positions, side by side on one canvas, so a class can
+    # see how much the number of moves varies. One scheduler steps all of them and one frame draws them.
+    def __init__(self, session, grid_size, players, rule, num_boards, statistics_name):
+        self.__session = session
+        self.__root = session.get_root()
+        self.__root.title("Wandering Game - Classroom")
+        self.__root.resizable(False, False)
+        self.__grid_size = grid_size
+        self.__players = players            # Start (position, color) pairs, the same on every board
+        self.__rule = rule
+        self.__num_boards = num_boards
+        self.__statistics_name = statistics_name  # Session statistics the level itself keeps, shared with it
+        self.__topology = get_topology(*grid_size)
+
+        # Boards are laid out in a square, with cells as large as the canvas allows
+        self.__columns = math.ceil(math.sqrt(num_boards))
+        rows = math.ceil(num_boards / self.__columns)
+        board_cells = max(grid_size)
+        self.__cell_size = max(1, min(50, (MAX_CANVAS_SIZE - TILE_GAP * (self.__columns - 1)) // (self.__columns * board_cells)))
+        self.__board_width = grid_size[0] * self.__cell_size
+        self.__board_height = grid_size[1] * self.__cell_size
+        self.__canvas = tk.Canvas(self.__root, bg="white",
+                                  width=self.__columns * (self.__board_width + TILE_GAP) - TILE_GAP,
+                                  height=rows * (self.__board_height + TILE_GAP) - TILE_GAP)
+        self.__canvas.pack()
+
+        # Live results of the boards that are done
+        self.__summary = tk.Label(self.__root, font=("Helvetica", 14))
+        self.__summary.pack(pady=5)
+
+        self.__renderers = [BoardRenderer(self.__canvas, self.__cell_size, origin=self.__origin(index))
+                            for index in range(num_boards)]
+        self.__scheduler = GameScheduler(self.__session, RendererGroup(self.__canvas, self.__renderers),
+                                         profiler=self.__session.get_profiler())
+        controls = create_speed_controls(self.__root, self.__scheduler)
+        controls.pack(pady=5)
+        add_profiler_overlay(self.__session, self.__canvas, controls)  # Only when the session is profiled
+        self.__stats_window = None
+        self.__reset_game()
+
+    # Pixel position of the top left corner of board index.
+    def __origin(self, index):
+        row, column = divmod(index, self.__columns)
+        return column * (self.__board_width + TILE_GAP), row * (self.__board_height + TILE_GAP)
+
+    def create_grid(self):
+        for index in range(self.__num_boards):
+            draw_grid(self.__canvas, self.__grid_size, self.__cell_size, origin=self.__origin(index), tag=f"board{index}")
+
+    def __reset_game(self):
+        if self.__stats_window is not None:
+            self.__stats_window.destroy()
+            self.__stats_window = None
+        self.__canvas.delete(RESULT_TAG)
+        self.create_grid()
+        self.__results = RunningStats()  # Moves of the boards of this round
+        self.__simulations = []
+        for renderer in self.__renderers:
+            simulation = WanderingSimulation(self.__grid_size, self.__players, rule=self.__rule, topology=self.__topology)
+            renderer.clear()
+            for walker in simulation.get_walkers():
+                renderer.add_walker(walker.walker_id, walker.get_color(), walker.get_position())
+            simulation.subscribe(renderer.on_step)
+            self.__session.record(simulation)
+            self.__simulations.append(simulation)
+        self.__group = SimulationGroup(self.__simulations, self.__board_over)
+        self.__update_summary()
+        self.run_game()
+
+    def run_game(self):
+        self.__scheduler.start(self.__group, self.__game_over, first_delay=600)
+
+    # A single board is done: write its result on it and count it, while the other boards keep going.
+    def __board_over(self, index):
+        simulation = self.__simulations[index]
+        moves = simulation.get_step_count()
+        self.__results.add(moves)
+        self.__session.get_statistics(self.__statistics_name).add(moves)
+        if self.__rule == RULE_MERGE:
+            self.__session.get_statistics(level_3_5.RUN_STATISTICS).merge(simulation.get_run_statistics())
+        # Redraw the board from the simulation: during a skip its renderer saw none of the merges
+        self.__renderers[index].sync(simulation.get_walkers())
+        left, top = self.__origin(index)
+        self.__canvas.create_text(left + self.__board_width // 2, top + self.__board_height // 2, text=str(moves),
+                                  font=("Helvetica", max(10, min(24, self.__board_height // 3)), "bold"),
+                                  fill="black", tags=RESULT_TAG)
+        self.__update_summary()
+
+    def __update_summary(self):
+        results = self.__results
+        text = f"Boards finished: {results.get_count()} of {self.__num_boards}"
+        if results.get_count():
+            text += (f"    Average: {results.get_mean():.1f} moves    Median: {results.quantile(0.5):.0f}"
+                     f"    Fewest: {results.get_min()}    Most: {results.get_max()}")
+        self.__summary.config(text=text)
+
+    def __game_over(self):
+        self.__session.after(500, self.show_statistics)
+
+    def show_statistics(self):
+        results = self.__results
+        stats_window = tk.Toplevel(self.__root)
+        stats_window.title("Classroom Statistics")
+        stats_window.resizable(False, False)
+        tk.Label(stats_window, text="Every board is done!", font=("Helvetica", 18)).pack(pady=10, padx=20)
+        stats_text = (
+            f"Boards: {results.get_count()}\n"
+            f"Average: {results.get_mean():.1f} moves (spread {results.get_std():.1f})\n"
+            f"Fewest: {results.get_min()}    Most: {results.get_max()}\n"
+            f"Half of the boards took {results.quantile(0.5):.0f} moves or fewer\n"
+            f"Nine in ten took {results.quantile(0.9):.0f} moves or fewer"
+        )
+        tk.Label(stats_window, text=stats_text, font=("Helvetica", 14), justify=tk.LEFT).pack(pady=10, padx=20)
+
+        button_frame = tk.Frame(stats_window)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Play Again", command=self.__reset_game).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Change Settings", command=self.__change_settings).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Quit Game", command=self.__session.close).pack(side=tk.LEFT, padx=5)
+        stats_window.protocol("WM_DELETE_WINDOW", self.__session.close)
+        self.__stats_window = stats_window
+
+    def __change_settings(self):
+        self.__scheduler.stop()
+        self.__session.clear()
+        MultiBoardStartScreen(self.__session)
+
+
+class MultiBoardStartScreen:
+    def __init__(self, session):
+        self.__session = session
+        self.__root = session.get_root()
+        self.__root.title("Classroom Mode")
+        self.__root.resizable(False, False)
+        self.__setup_ui()
+
+    def __setup_ui(self):
+        settings_frame = tk.Frame(self.__root)
+        settings_frame.pack(pady=10)
+        tk.Label(settings_frame, text="Level:").pack(side=tk.LEFT, padx=(10, 5))
+        self.__level = tk.StringVar(self.__root, value=LEVELS[0])
+        tk.OptionMenu(settings_frame, self.__level, *LEVELS).pack(side=tk.LEFT, padx=(0, 15))
+        tk.Label(settings_frame, text="Boards:").pack(side=tk.LEFT, padx=(10, 5))
+        self.__boards = tk.StringVar(self.__root, value=str(BOARD_COUNTS[0]))
+        tk.OptionMenu(settings_frame, self.__boards, *[str(count) for count in BOARD_COUNTS]).pack(side=tk.LEFT, padx=(0, 15))
+
+        # Grid and players of the 3-5 boards; K-2 boards are square with a random size, like the K-2 level
+        grid_frame = tk.Frame(self.__root)
+        grid_frame.pack(pady=10)
+        tk.Label(grid_frame, text="Grade 3-5 only. Rows:").pack(side=tk.LEFT, padx=(10, 5))
+        self.__rows_entry = tk.Entry(grid_frame, width=5)
+        self.__rows_entry.pack(side=tk.LEFT, padx=(0, 15))
+        tk.Label(grid_frame, text="Columns:").pack(side=tk.LEFT, padx=(10, 5))
+        self.__cols_entry = tk.Entry(grid_frame, width=5)
+        self.__cols_entry.pack(side=tk.LEFT, padx=(0, 15))
+        tk.Label(grid_frame, text="Players (in the corners):").pack(side=tk.LEFT, padx=(10, 5))
+        self.__players_entry = tk.Entry(grid_frame, width=5)
+        self.__players_entry.pack(side=tk.LEFT, padx=(0, 15))
+
+        start_button = tk.Button(self.__root, text="Start", command=self.__start_game)
+        start_button.pack(pady=20)
+        self.__root.bind('<Return>', lambda event: start_button.invoke())
+
+    def __start_game(self):
+        try:
+            num_boards = int(self.__boards.get())
+            if self.__level.get() == LEVELS[0]:
+                grid_size = random.randint(3, 7)
+                grid_size = (grid_size, grid_size)
+                players = corner_positions(grid_size, 2)
+                rule, statistics_name = RULE_MEET, level_k_2.GAME_STATISTICS
+            else:
+                try:
+                    rows, cols = int(self.__rows_entry.get()), int(self.__cols_entry.get())
+                    num_players = int(self.__players_entry.get())
+                except ValueError:
+                    raise ValueError("Only Numbers are allowed as an Input for rows, columns and players.")
+                if not (2 <= rows <= level_3_5.MAX_GRID_SIZE and 2 <= cols <= level_3_5.MAX_GRID_SIZE):
+                    raise ValueError(f"Rows and columns must be between 2 and {level_3_5.MAX_GRID_SIZE}.")
+                if not (2 <= num_players <= len(PLAYER_COLORS)):
+                    raise ValueError(f"Number of players must be between 2 and {len(PLAYER_COLORS)}.")
+                grid_size = (cols, rows)
+                players = corner_positions(grid_size, num_players)
+                topology = get_topology(*grid_size)
+                if not topology.can_meet([topology.cell_of(position) for position, _ in players]):
+                    if num_players == 2:
+                        hint = "Use an even number of rows plus columns."
+                    else:
+                        hint = "With 3 or 4 players both the rows and the columns must be odd."
+                    raise ValueError("The chosen corners are on different checkerboard colors, so the players "
+                                     f"would always miss each other. {hint}")
+                rule, statistics_name = RULE_MERGE, level_3_5.GAME_STATISTICS
+
+            self.__session.clear()
+            MultiBoardGame(self.__session, grid_size, players, rule, num_boards, statistics_name)
+
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", str(e))
+
+
+class MultiBoardLauncher(AbstractGameLauncher):
+    # Method to launch the game, in the given session if its main loop is already running.
+    def launch_game(self, session=None):
+        if session is not None:
+            MultiBoardStartScreen(session)
+            return
+        session = GameSession()
+        MultiBoardStartScreen(session)
+        session.mainloop()
+
+
+if __name__ == "__main__":
+    game_launcher = MultiBoardLauncher()
+    game_launcher.launch_game()
@@ -0,0 +1,123 @@
+from array import array
+
+# Grids up to this many cells keep their walker counts in a dense array.
+DENSE_OCCUPANCY_CELLS = 1 << 16
+# Larger grids still use the dense array when at least one cell in this many holds a walker.
+DENSE_OCCUPANCY_RATIO = 64
+
+
+class DenseOccupancy:
+    # Walkers on every cell of a grid, with the walker counts in an array indexed by cell.
+    # Cells are listed as crowded when their count reaches 2, so finding the cells holding more than
+    # one walker only looks at the cells that filled up, never at every walker or every cell.
+    def __init__(self, num_cells):
+        self.__counts = array('i', [0]) * num_cells
+        self.__occupants = [None] * num_cells   # Walkers on the cell in the order they entered it, None if empty
+        self.__crowded = {}                     # Cells that reached 2 walkers, in the order they did
+
+    def get_count(self, cell):
+        return self.__counts[cell]
+
+    def get_occupants(self, cell):
+        return self.__occupants[cell] or []
+
+    def add(self, cell, walker):
+        count = self.__counts[cell] + 1
+        self.__counts[cell] = count
+        if count == 1:
+            self.__occupants[cell] = [walker]
+            return
+        self.__occupants[cell].append(walker)
+        if count == 2 and cell not in self.__crowded:
+            self.__crowded[cell] = None
+
+    def remove(self, cell, walker):
+        count = self.__counts[cell] - 1
+        self.__counts[cell] = count
+        if count == 0:
+            self.__occupants[cell] = None
+        else:
+            self.__occupants[cell].remove(walker)
+
+    # remove() and add() in one call, as this runs for every walker at every step
+    def move(self, walker, old_cell, new_cell):
+        counts, cell_occupants = self.__counts, self.__occupants
+        count = counts[old_cell] - 1
+        counts[old_cell] = count
+        if count == 0:
+            cell_occupants[old_cell] = None
+        else:
+            cell_occupants[old_cell].remove(walker)
+        count = counts[new_cell] + 1
+        counts[new_cell] = count
+        if count == 1:
+            cell_occupants[new_cell] = [walker]
+            return
+        cell_occupants[new_cell].append(walker)
+        if count == 2 and new_cell not in self.__crowded:
+            self.__crowded[new_cell] = None
+
+    # Cells holding more than one walker, in the order they filled up.
+    def crowded_cells(self):
+        counts = self.__counts
+        crowded = [cell for cell in self.__crowded if counts[cell] > 1]
+        self.__crowded = dict.fromkeys(crowded)  # Cells that emptied again are forgotten
+        return crowded
+
+
+class SparseOccupancy:
+    # Same as DenseOccupancy, but only occupied cells are stored, in a dict keyed by cell.
+    # Memory grows with the number of walkers instead of the size of the grid.
+    def __init__(self):
+        self.__occupants = {}   # Cell -> walkers on it, in the order they entered it
+        self.__crowded = {}
+
+    def get_count(self, cell):
+        occupants = self.__occupants.get(cell)
+        return len(occupants) if occupants is not None else 0
+
+    def get_occupants(self, cell):
+        return self.__occupants.get(cell, [])
+
+    def add(self, cell, walker):
+        occupants = self.__occupants.get(cell)
+        if occupants is None:
+            self.__occupants[cell] = [walker]
+            return
+        occupants.append(walker)
+        if len(occupants) == 2 and cell not in self.__crowded:
+            self.__crowded[cell] = None
+
+    def remove(self, cell, walker):
+        occupants = self.__occupants[cell]
+        if len(occupants) == 1:
+            del self.__occupants[cell]
+        else:
+            occupants.remove(walker)
+
+    def move(self, walker, old_cell, new_cell):
+        cell_occupants = self.__occupants
+        occupants = cell_occupants[old_cell]
+        if len(occupants) == 1:
+            del cell_occupants[old_cell]
+        else:
+            occupants.remove(walker)
+        occupants = cell_occupants.get(new_cell)
+        if occupants is None:
+            cell_occupants[new_cell] = [walker]
+            return
+        occupants.append(walker)
+        if len(occupants) == 2 and new_cell not in self.__crowded:
+            self.__crowded[new_cell] = None
+
+    def crowded_cells(self):
+        crowded = [cell for cell in self.__crowded if self.get_count(cell) > 1]
+        self.__crowded = dict.fromkeys(crowded)
+        return crowded
+
+
+# The dense array for small or crowded grids, the dict for huge grids with few walkers.
+def create_occupancy(num_cells, num_walkers):
+    if num_cells <= DENSE_OCCUPANCY_CELLS or num_cells <= num_walkers * DENSE_OCCUPANCY_RATIO:
+        return DenseOccupancy(num_cells)
+    return SparseOccupancy()
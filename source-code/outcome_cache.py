@@ -0,0 +1,156 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from batch_simulation import run_batch
+from grid_topology import get_topology
+from simulation import RULE_MERGE
+
+# Predictions computed once are kept here, shared by every run of the game.
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".wandering_in_the_woods", "outcomes.sqlite3")
+CACHE_VERSION = 1
+MEMORY_ENTRIES = 4096       # Predictions kept in memory, least recently used first out
+PREDICTION_GAMES = 2000     # Games simulated for a prediction
+PREDICTION_MAX_STEPS = 100000
+NEVER_MEETS = {"never_meets": True}  # Prediction for players that always miss each other
+
+
+# The same configuration for every mirror image and rotation of the grid, and any order of the players.
+# Returns ((width, height), start cells) with the smallest sorted start cells over the 8 symmetries;
+# transposed grids are the same grid turned by 90 degrees, so 4x7 and 7x4 share their entries.
+def canonical_config(grid_size, start_positions):
+    width, height = grid_size
+    candidates = []
+    for transpose in (False, True):
+        size = (height, width) if transpose else (width, height)
+        for mirror_x in (False, True):
+            for mirror_y in (False, True):
+                cells = []
+                for x, y in start_positions:
+                    if transpose:
+                        x, y = y, x
+                    if mirror_x:
+                        x = size[0] - 1 - x
+                    if mirror_y:
+                        y = size[1] - 1 - y
+                    cells.append((x, y))
+                candidates.append((size, tuple(sorted(cells))))
+    return min(candidates)
+
+
+def cache_key(config):
+    (width, height), cells = config
+    return f"v{CACHE_VERSION}:{width}x{height}:" + ";".join(f"{x},{y}" for x, y in cells)
+
+
+# Meeting and finish time statistics of a configuration, simulated with a seed derived from it so the
+# prediction is the same whoever computes it.
+def predict_outcome(config, num_games=PREDICTION_GAMES, max_steps=PREDICTION_MAX_STEPS):
+    grid_size, cells = config
+    topology = get_topology(*grid_size)
+    if not topology.can_meet([topology.cell_of(cell) for cell in cells]):
+        return dict(NEVER_MEETS)
+    seed = int.from_bytes(cache_key(config).encode(), "little") % (1 << 63)
+    result = run_batch(grid_size, list(cells), num_games, rule=RULE_MERGE, max_steps=max_steps,
+                       rng=np.random.default_rng(seed))
+    return result.summary()
+
+
+class OutcomeCache:
+    # Predictions in two levels: an in-memory LRU answering repeated lookups in microseconds, backed by a
+    # SQLite file that keeps them across runs. Missing predictions are computed on a background thread;
+    # callers look them up again later instead of waiting.
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_entries=MEMORY_ENTRIES):
+        self.__memory = OrderedDict()  # Key -> prediction, most recently used last
+        self.__memory_entries = memory_entries
+        self.__lock = threading.Lock()  # Guards the memory cache, the database and the pending keys
+        self.__pending = set()          # Keys waiting for or being computed by the worker
+        self.__requests = queue.LifoQueue()  # The latest request first: the one the player is looking at
+        self.__thread = None
+        self.__database = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Used from the worker and the Tk thread, always under the lock
+            self.__database = sqlite3.connect(path, check_same_thread=False)
+            self.__database.execute("CREATE TABLE IF NOT EXISTS outcomes (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.__database.commit()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Outcome cache file unavailable, predictions are kept in memory only: {e}")
+            self.__database = None
+
+    # Cached prediction of config (from canonical_config), or None if it has not been computed yet.
+    def get(self, config):
+        key = cache_key(config)
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                return self.__memory[key]
+            if self.__database is None:
+                return None
+            row = self.__database.execute("SELECT value FROM outcomes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            prediction = json.loads(row[0])
+            self.__remember(key, prediction)
+            return prediction
+
+    def __remember(self, key, prediction):
+        self.__memory[key] = prediction
+        self.__memory.move_to_end(key)
+        if len(self.__memory) > self.__memory_entries:
+            self.__memory.popitem(last=False)
+
+    def put(self, config, prediction):
+        key = cache_key(config)
+        with self.__lock:
+            self.__remember(key, prediction)
+            if self.__database is not None:
+                try:
+                    self.__database.execute("INSERT OR REPLACE INTO outcomes VALUES (?, ?)", (key, json.dumps(prediction)))
+                    self.__database.commit()
+                except sqlite3.Error as e:
+                    print(f"Outcome cache file unavailable, predictions are kept in memory only: {e}")
+                    self.__database = None
+
+    # Cached prediction of config, or None after asking the worker to compute it.
+    def request(self, config):
+        prediction = self.get(config)
+        if prediction is not None:
+            return prediction
+        key = cache_key(config)
+        with self.__lock:
+            if key not in self.__pending:
+                self.__pending.add(key)
+                self.__requests.put(config)
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="outcome-cache", daemon=True)
+                self.__thread.start()
+        return None
+
+    def __run(self):
+        while True:
+            config = self.__requests.get()
+            try:
+                if self.get(config) is None:
+                    self.put(config, predict_outcome(config))
+            except Exception as e:
+                print(f"Prediction failed for {cache_key(config)}: {e}")
+                with self.__lock:
+                    self.__remember(cache_key(config), {"error": str(e)})  # Not asked for again this run
+            finally:
+                with self.__lock:
+                    self.__pending.discard(cache_key(config))
+
+    def is_pending(self, config):
+        with self.__lock:
+            return cache_key(config) in self.__pending
+
+
+# One cache per process, opened on first use.
+@lru_cache(maxsize=None)
+def get_outcome_cache():
+    return OutcomeCache()
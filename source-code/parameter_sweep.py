@@ -0,0 +1,163 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from batch_simulation import run_batch
+from simulation import RULE_MERGE
+
+
+class SweepConfig:
+    def __init__(self, index, rows, cols, start_positions):
+        self.index = index                      # Position in the enumeration, the resume key within one sweep
+        self.rows = rows
+        self.cols = cols
+        self.start_positions = start_positions  # List of (x, y) cells, as WanderingGame receives them
+
+    def can_finish(self):
+        # Walkers on cells of different checkerboard colors never meet, so the game could never end
+        return len({(x + y) % 2 for x, y in self.start_positions}) == 1
+
+
+# Every configuration the 3-5 StartScreen accepts within the given ranges, in a fixed order.
+def enumerate_configs(rows_range=(2, 15), cols_range=(2, 15), players_range=(2, 4)):
+    index = 0
+    for rows in range(rows_range[0], rows_range[1] + 1):
+        for cols in range(cols_range[0], cols_range[1] + 1):
+            cells = [(x, y) for y in range(rows) for x in range(cols)]
+            for num_players in range(players_range[0], players_range[1] + 1):
+                if num_players >= rows * cols:
+                    continue  # StartScreen refuses more players than grid spaces
+                for start_positions in itertools.combinations(cells, num_players):
+                    yield SweepConfig(index, rows, cols, list(start_positions))
+                    index += 1
+
+
+def run_config(config, num_games, max_steps, seed):
+    record = {
+        "index": config.index,
+        "rows": config.rows,
+        "cols": config.cols,
+        "players": len(config.start_positions),
+        "starts": [list(position) for position in config.start_positions],
+    }
+    if not config.can_finish():
+        record["never_finishes"] = True
+        return record
+
+    # Each configuration gets its own stream derived from the sweep seed and its index, so results
+    # do not depend on which worker ran it or on whether the sweep was resumed.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(config.index,)))
+    result = run_batch((config.cols, config.rows), config.start_positions, num_games,
+                       rule=RULE_MERGE, max_steps=max_steps, rng=rng)
+    record.update(result.summary())
+    return record
+
+
+def run_chunk(configs, num_games, max_steps, seed):
+    return [run_config(config, num_games, max_steps, seed) for config in configs]
+
+
+# Indices already written by a previous run. A torn last line from an interrupted run is cut off.
+# The first line holds the parameters of the sweep; indices only name the same configurations when
+# they match, so a file written with other parameters is refused instead of resumed.
+def load_completed(output_path, parameters):
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    parameters = json.loads(json.dumps(parameters))  # Tuples compare as the lists read back
+    with open(output_path, "rb+") as output_file:
+        valid_length = 0
+        for line in output_file:
+            try:
+                record = json.loads(line)
+                if valid_length > 0:
+                    completed.add(record["index"])
+                elif record["sweep"] != parameters:
+                    raise RuntimeError(f"{output_path} was written by a sweep with other parameters "
+                                       f"({record['sweep']}), it cannot be resumed with {parameters}")
+            except (ValueError, KeyError, TypeError):
+                if valid_length == 0 and line.endswith(b"\n"):
+                    raise RuntimeError(f"{output_path} does not start with the parameters of a sweep, "
+                                       f"it cannot be resumed")
+                break  # A torn header alone is cut off too, and written again
+            valid_length += len(line)
+        output_file.truncate(valid_length)
+    return completed
+
+
+def chunked(configs, chunk_size):
+    chunk = []
+    for config in configs:
+        chunk.append(config)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ranges names the configurations swept, e.g. {"rows": (2, 15), "cols": (2, 15), "players": (2, 4)}.
+def run_sweep(output_path, configs, num_games=10000, max_steps=100000, seed=0, workers=None, chunk_size=16, progress=None,
+              ranges=None):
+    parameters = {**(ranges or {}), "games": num_games, "max_steps": max_steps, "seed": seed}
+    completed = load_completed(output_path, parameters)
+    pending = (config for config in configs if config.index not in completed)
+    chunks = chunked(pending, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(output_path, "a") as output_file:
+        if output_file.tell() == 0:
+            output_file.write(json.dumps({"sweep": parameters}) + "\n")
+        # Keep only a few chunks in flight so huge sweeps never hold every configuration in memory
+        in_flight = set()
+        for chunk in itertools.islice(chunks, workers * 2):
+            in_flight.add(executor.submit(run_chunk, chunk, num_games, max_steps, seed))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for record in future.result():
+                    output_file.write(json.dumps(record) + "\n")
+                    written += 1
+                output_file.flush()  # Everything written so far survives an interruption
+                if progress is not None:
+                    progress(written)
+            for chunk in itertools.islice(chunks, len(done)):
+                in_flight.add(executor.submit(run_chunk, chunk, num_games, max_steps, seed))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Meeting and merge statistics for every 3-5 level configuration.")
+    parser.add_argument("output", help="JSON lines file the results are appended to; an existing file is resumed")
+    parser.add_argument("--rows", type=int, nargs=2, default=(2, 15), metavar=("MIN", "MAX"))
+    parser.add_argument("--cols", type=int, nargs=2, default=(2, 15), metavar=("MIN", "MAX"))
+    parser.add_argument("--players", type=int, nargs=2, default=(2, 4), metavar=("MIN", "MAX"))
+    parser.add_argument("--games", type=int, default=10000, help="games simulated per configuration")
+    parser.add_argument("--max-steps", type=int, default=100000, help="steps after which a game counts as unfinished")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=16, help="configurations per worker task")
+    parser.add_argument("--limit", type=int, default=None, help="only sweep the first LIMIT configurations")
+    args = parser.parse_args(argv)
+
+    configs = enumerate_configs(tuple(args.rows), tuple(args.cols), tuple(args.players))
+    if args.limit is not None:
+        configs = itertools.islice(configs, args.limit)
+
+    def progress(written):
+        print(f"\r{written} configurations written", end="", flush=True)
+
+    ranges = {"rows": args.rows, "cols": args.cols, "players": args.players}
+    try:
+        written = run_sweep(args.output, configs, args.games, args.max_steps, args.seed,
+                            args.workers, args.chunk_size, progress, ranges)
+    except RuntimeError as e:
+        parser.error(str(e))
+    print(f"\r{written} configurations written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import json
+import tkinter as tk
+from array import array
+
+# Phases of a tick: the walkers' moves, finding crowded cells, merging, the simulation's listeners
+# (renderer bookkeeping and sounds), drawing the canvas, and how late the scheduler's callback ran.
+PHASES = ("move", "collision", "merge", "listeners", "canvas", "delay")
+PERCENTILES = (50, 95, 99)
+RING_SIZE = 4096             # Latest samples kept per phase
+OVERLAY_INTERVAL = 500       # Milliseconds between two overlay refreshes
+OVERLAY_TAG = "profiler"
+DEFAULT_PROFILE_PATH = "tick_profile.json"
+
+
+class TickProfiler:
+    # Durations of the phases of every tick, in seconds. Each phase keeps its latest RING_SIZE samples in a
+    # fixed-size ring, so memory stays the same however long the game runs.
+    def __init__(self, path=None, ring_size=RING_SIZE):
+        self.__path = path          # File the profile is written to on exit, None to keep it in memory
+        self.__ring_size = ring_size
+        self.__samples = {phase: array('d', bytes(8 * ring_size)) for phase in PHASES}
+        self.__counts = dict.fromkeys(PHASES, 0)  # Samples ever recorded; the ring holds the latest of them
+
+    def get_path(self):
+        return self.__path
+
+    def record(self, phase, seconds):
+        count = self.__counts[phase]
+        self.__samples[phase][count % self.__ring_size] = seconds
+        self.__counts[phase] = count + 1
+
+    def get_count(self, phase):
+        return self.__counts[phase]
+
+    # Samples of phase still in its ring, oldest first.
+    def get_samples(self, phase):
+        count, size = self.__counts[phase], self.__ring_size
+        samples = self.__samples[phase]
+        if count <= size:
+            return samples[:count]
+        start = count % size
+        return samples[start:] + samples[:start]
+
+    # {percentile: seconds} over the samples in the ring, empty if the phase has none yet.
+    def percentiles(self, phase):
+        samples = sorted(self.get_samples(phase))
+        if not samples:
+            return {}
+        return {p: samples[min(len(samples) - 1, len(samples) * p // 100)] for p in PERCENTILES}
+
+    # One line per phase with its percentiles in milliseconds.
+    def format_summary(self):
+        lines = ["phase      " + "".join(f"{f'p{p}':>9}" for p in PERCENTILES) + "  samples"]
+        for phase in PHASES:
+            values = self.percentiles(phase)
+            cells = "".join(f"{values[p] * 1000:9.3f}" if values else f"{'-':>9}" for p in PERCENTILES)
+            lines.append(f"{phase:<11}{cells}  {self.__counts[phase]}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "ring_size": self.__ring_size,
+            "phases": {
+                phase: {
+                    "count": self.__counts[phase],
+                    **{f"p{p}_ms": seconds * 1000 for p, seconds in self.percentiles(phase).items()},
+                    "samples_ms": [seconds * 1000 for seconds in self.get_samples(phase)],
+                }
+                for phase in PHASES
+            },
+        }
+
+    # Write the profile to its file, if it has one.
+    def dump(self):
+        if self.__path is None:
+            return
+        try:
+            with open(self.__path, "w") as profile_file:
+                json.dump(self.to_dict(), profile_file, indent=1)
+            print(f"Tick profile written to {self.__path}")
+        except OSError as e:
+            print(f"Could not write the tick profile: {e}")
+
+
+class ProfilerOverlay:
+    # Percentiles of every phase drawn in the top left corner of canvas, shown and hidden by a button.
+    # It only refreshes while it is shown.
+    def __init__(self, session, canvas, profiler):
+        self.__session = session
+        self.__canvas = canvas
+        self.__profiler = profiler
+        self.__job = None
+        self.__button = None
+
+    # Add the "Show Profile" button to parent, e.g. the speed controls.
+    def create_toggle(self, parent):
+        self.__button = tk.Button(parent, text="Show Profile", command=self.toggle)
+        self.__button.pack(side=tk.LEFT, padx=(0, 10))
+        return self.__button
+
+    def is_shown(self):
+        return self.__job is not None
+
+    def toggle(self):
+        if self.is_shown():
+            self.__session.after_cancel(self.__job)
+            self.__job = None
+            self.__canvas.delete(OVERLAY_TAG)
+        else:
+            self.__refresh()
+        if self.__button is not None:
+            self.__button.config(text="Hide Profile" if self.is_shown() else "Show Profile")
+
+    def __refresh(self):
+        canvas = self.__canvas
+        canvas.delete(OVERLAY_TAG)
+        text = canvas.create_text(4, 4, anchor=tk.NW, text=self.__profiler.format_summary(), font=("Courier", 9),
+                                  fill="white", tags=OVERLAY_TAG)
+        canvas.tag_lower(canvas.create_rectangle(canvas.bbox(text), fill="black", outline="", tags=OVERLAY_TAG), text)
+        self.__job = self.__session.after(OVERLAY_INTERVAL, self.__refresh)
+
+
+# Profile overlay and its button for a game screen, if the session is profiled.
+def add_profiler_overlay(session, canvas, controls):
+    profiler = session.get_profiler()
+    if profiler is None:
+        return None
+    overlay = ProfilerOverlay(session, canvas, profiler)
+    overlay.create_toggle(controls)
+    return overlay
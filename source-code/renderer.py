@@ -0,0 +1,186 @@
+import tkinter as tk
+from functools import lru_cache
+
+# Time between two redraws in milliseconds, about 30 frames per second. Independent of the game speed.
+FRAME_INTERVAL = 33
+
+# Canvas tag of the grid, which survives game resets so replays do not redraw it.
+GRID_TAG = "grid"
+# Grids needing more lines than this are drawn as one pre-rendered background image instead.
+MAX_GRID_LINES = 200
+# Maps with more blocked cells than this are drawn as an image too, instead of one rectangle per cell.
+MAX_BLOCKED_ITEMS = 500
+# Grid lines are only drawn when cells are at least this many pixels wide.
+MIN_GRID_CELL_SIZE = 5
+BLOCKED_COLOR = "#404040"  # Fill of blocked cells
+BLOCKED_PIXEL = bytes.fromhex(BLOCKED_COLOR[1:])
+
+
+# Binary PPM image of the grid lines and blocked cells, built once per grid, cell size and map.
+@lru_cache(maxsize=16)
+def grid_image_data(grid_size, cell_size, blocked=frozenset(), lines=True):
+    width, height = grid_size[0] * cell_size, grid_size[1] * cell_size
+    white, black = b"\xff\xff\xff", b"\x00\x00\x00"
+    line_columns = {i * cell_size for i in range(grid_size[0])} | {width - 1} if lines else set()
+    line_rows = {j * cell_size for j in range(grid_size[1])} | {height - 1} if lines else set()
+    line_row = black * width
+    pixels = []
+    for cell_y in range(grid_size[1]):
+        plain_row = b"".join(
+            black if x in line_columns else BLOCKED_PIXEL if (x // cell_size, cell_y) in blocked else white
+            for x in range(width)
+        )
+        for y in range(cell_y * cell_size, (cell_y + 1) * cell_size):
+            pixels.append(line_row if y in line_rows else plain_row)
+    return b"P6 %d %d 255\n" % (width, height) + b"".join(pixels)
+
+
+# Draw the grid lines and blocked cells once; calling it again on a canvas that still has its grid does nothing.
+# Several boards can share a canvas: each is drawn at its origin (pixels) under its own tag, and every
+# grid also carries GRID_TAG so all of them can be deleted at once.
+def draw_grid(canvas, grid_size, cell_size, color="black", blocked=frozenset(), origin=(0, 0), tag=GRID_TAG):
+    lines = cell_size >= MIN_GRID_CELL_SIZE
+    if not (lines or blocked) or canvas.find_withtag(tag):
+        return
+    left, top = origin
+    width, height = grid_size[0] * cell_size, grid_size[1] * cell_size
+    tags = (GRID_TAG, tag)
+
+    if not lines or grid_size[0] + grid_size[1] + 2 > MAX_GRID_LINES or len(blocked) > MAX_BLOCKED_ITEMS:
+        key = (tuple(grid_size), cell_size, frozenset(blocked), lines)
+        # Tk forgets images Python holds no reference to; boards with the same grid share one image
+        if not hasattr(canvas, "grid_images"):
+            canvas.grid_images = {}
+        if key not in canvas.grid_images:
+            canvas.grid_images[key] = tk.PhotoImage(master=canvas, data=grid_image_data(*key), format="PPM")
+        canvas.create_image(left, top, anchor=tk.NW, image=canvas.grid_images[key], tags=tags)
+        return
+
+    for x, y in blocked:
+        canvas.create_rectangle(left + x * cell_size, top + y * cell_size, left + (x + 1) * cell_size,
+                                top + (y + 1) * cell_size, fill=BLOCKED_COLOR, outline="", tags=tags)
+    # One line per column and per row border instead of one rectangle per cell
+    for i in range(grid_size[0] + 1):
+        canvas.create_line(left + i * cell_size, top, left + i * cell_size, top + height, fill=color, tags=tags)
+    for j in range(grid_size[1] + 1):
+        canvas.create_line(left, top + j * cell_size, left + width, top + j * cell_size, fill=color, tags=tags)
+
+
+class Avatar:
+    __slots__ = ("item", "color", "position", "drawn_position")
+
+    def __init__(self, item, color, position):
+        self.item = item                # Canvas item of the oval
+        self.color = color
+        self.position = position        # Latest position reported by the simulation
+        self.drawn_position = position  # Position the oval is currently drawn at
+
+    def get_position(self):
+        return self.position
+
+    def get_avatar(self):
+        return self.item
+
+    def get_color(self):
+        return self.color
+
+
+class BoardRenderer:
+    # Draws when flush() is called, once per frame by the GameScheduler.
+    # origin: pixel position of the board's top left corner, for boards sharing a canvas.
+    def __init__(self, canvas, cell_size, origin=(0, 0)):
+        self.__canvas = canvas
+        self.__cell_size = cell_size
+        self.__origin = origin
+        self.__avatars = {}     # walker id -> Avatar
+        self.__pool = []        # Hidden oval items, reused instead of deleting and creating ovals on merges
+        self.__dirty = {}       # walker id -> Avatar that moved since the last frame
+
+    def __bounds(self, position):
+        x, y = position
+        size = self.__cell_size
+        left, top = self.__origin
+        return left + x * size, top + y * size, left + (x + 1) * size, top + (y + 1) * size
+
+    def add_walker(self, walker_id, color, position):
+        if self.__pool:
+            item = self.__pool.pop()
+            self.__canvas.coords(item, *self.__bounds(position))
+            self.__canvas.itemconfig(item, fill=color, state="normal")
+        else:
+            item = self.__canvas.create_oval(*self.__bounds(position), fill=color, outline="black")
+        self.__avatars[walker_id] = Avatar(item, color, position)
+        return self.__avatars[walker_id]
+
+    def remove_walker(self, walker_id):
+        avatar = self.__avatars.pop(walker_id)
+        self.__dirty.pop(walker_id, None)
+        self.__canvas.itemconfig(avatar.item, state="hidden")
+        self.__pool.append(avatar.item)
+
+    def move_walker(self, walker_id, position):
+        avatar = self.__avatars[walker_id]
+        avatar.position = position
+        self.__dirty[walker_id] = avatar
+
+    def change_color(self, walker_id, color):
+        avatar = self.__avatars[walker_id]
+        if avatar.color != color:
+            avatar.color = color
+            self.__canvas.itemconfig(avatar.item, fill=color)
+
+    # Hide every avatar and keep the ovals in the pool for the next game on this canvas
+    def clear(self):
+        for avatar in self.__avatars.values():
+            self.__canvas.itemconfig(avatar.item, state="hidden")
+            self.__pool.append(avatar.item)
+        self.__avatars.clear()
+        self.__dirty.clear()
+
+    # Draw the walkers as they are now, for when the renderer missed steps (e.g. a game skipped to its end)
+    def sync(self, walkers):
+        self.clear()
+        for walker in walkers:
+            self.add_walker(walker.walker_id, walker.get_color(), walker.get_position())
+
+    def get_avatar(self, walker_id):
+        return self.__avatars[walker_id]
+
+    def get_avatars(self):
+        return dict(self.__avatars)
+
+    # Simulation listener: only records what changed, drawing waits for the next frame
+    def on_step(self, event):
+        for walker_id, _, new_position in event.moves:
+            self.move_walker(walker_id, new_position)
+        for merge in event.merges:
+            if merge.new_walker is None:
+                continue  # The walkers met but stay on the board
+            for walker_id in merge.merged_ids:
+                self.remove_walker(walker_id)
+            new_walker = merge.new_walker
+            self.add_walker(new_walker.walker_id, new_walker.get_color(), new_walker.get_position())
+
+    # Tcl commands drawing every avatar whose position changed since the last frame. They count as drawn.
+    def frame_commands(self):
+        if not self.__dirty:
+            return []
+        canvas_path = str(self.__canvas)
+        commands = []
+        for avatar in self.__dirty.values():
+            if avatar.position == avatar.drawn_position:
+                continue  # Moved away and back since the last frame
+            avatar.drawn_position = avatar.position
+            commands.append("%s coords %d %d %d %d %d" % ((canvas_path, avatar.item) + self.__bounds(avatar.position)))
+        self.__dirty.clear()
+        return commands
+
+    # Draw every avatar whose position changed, with one call into Tcl for the whole frame
+    def flush(self):
+        commands = self.frame_commands()
+        if commands:
+            self.__canvas.tk.eval("\n".join(commands))
+
+    # The game is over: show the final positions
+    def stop(self):
+        self.flush()
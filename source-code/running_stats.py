@@ -0,0 +1,131 @@
+import math
+from array import array
+
+# Quantiles from the sketch are within this relative error of the true value.
+SKETCH_ACCURACY = 0.01
+# Log-spaced buckets of the sketch; with 1% accuracy they cover values up to about 10^17.
+SKETCH_BUCKETS = 2048
+
+
+class QuantileSketch:
+    # Fixed-size streaming quantile estimate for non-negative values. Values are counted in buckets whose
+    # bounds grow geometrically, so every bucket is narrow relative to the values it holds.
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY, num_buckets=SKETCH_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("The relative accuracy must be between 0 and 1.")
+        self.__relative_accuracy = relative_accuracy
+        self.__gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.__log_gamma = math.log(self.__gamma)
+        self.__counts = array('Q', [0]) * num_buckets  # Bucket i holds the values in (gamma^(i-1), gamma^i]
+        self.__zero_count = 0                          # Values of zero, which have no logarithm
+        self.__count = 0
+
+    def get_count(self):
+        return self.__count
+
+    def add(self, value):
+        if value < 0:
+            raise ValueError("The sketch only holds non-negative values.")
+        self.__count += 1
+        if value == 0:
+            self.__zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.__log_gamma)
+        self.__counts[min(max(index, 0), len(self.__counts) - 1)] += 1
+
+    # Estimate of the value below which a fraction q of the values lie, None if nothing was added.
+    def quantile(self, q):
+        if not 0 <= q <= 1:
+            raise ValueError("The quantile must be between 0 and 1.")
+        if self.__count == 0:
+            return None
+        rank = max(0, math.ceil(q * self.__count) - 1)  # Nearest rank, counted from 0
+        seen = self.__zero_count
+        if rank < seen:
+            return 0.0
+        for index, count in enumerate(self.__counts):
+            seen += count
+            if rank < seen:
+                # The value in the middle of the bucket, relative to its bounds
+                return 2 * self.__gamma ** index / (self.__gamma + 1)
+        return 2 * self.__gamma ** (len(self.__counts) - 1) / (self.__gamma + 1)
+
+    def merge(self, other):
+        if (other.__relative_accuracy, len(other.__counts)) != (self.__relative_accuracy, len(self.__counts)):
+            raise ValueError("Only sketches with the same accuracy and size can be merged.")
+        for index, count in enumerate(other.__counts):
+            if count:
+                self.__counts[index] += count
+        self.__zero_count += other.__zero_count
+        self.__count += other.__count
+
+
+class RunningStats:
+    # Count, total, min, max, mean and variance (Welford's method) and quantiles of a stream of values,
+    # in constant memory and constant time per value.
+    def __init__(self):
+        self.__count = 0
+        self.__total = 0
+        self.__min = None
+        self.__max = None
+        self.__mean = 0.0
+        self.__squared_deviations = 0.0  # Sum of squared differences from the mean
+        self.__sketch = QuantileSketch()
+
+    def add(self, value):
+        self.__count += 1
+        self.__total += value
+        if self.__min is None or value < self.__min:
+            self.__min = value
+        if self.__max is None or value > self.__max:
+            self.__max = value
+        delta = value - self.__mean
+        self.__mean += delta / self.__count
+        self.__squared_deviations += delta * (value - self.__mean)
+        self.__sketch.add(value)
+
+    # Add every value seen by other, as if they had been added one by one.
+    def merge(self, other):
+        if other.__count == 0:
+            return
+        if self.__count == 0:
+            self.__min, self.__max = other.__min, other.__max
+        else:
+            self.__min = min(self.__min, other.__min)
+            self.__max = max(self.__max, other.__max)
+        count = self.__count + other.__count
+        delta = other.__mean - self.__mean
+        self.__squared_deviations += other.__squared_deviations + delta * delta * self.__count * other.__count / count
+        self.__mean += delta * other.__count / count
+        self.__count = count
+        self.__total += other.__total
+        self.__sketch.merge(other.__sketch)
+
+    def get_count(self):
+        return self.__count
+
+    def get_total(self):
+        return self.__total
+
+    def get_min(self):
+        return self.__min
+
+    def get_max(self):
+        return self.__max
+
+    def get_mean(self):
+        return self.__mean
+
+    # Population variance of the values, 0 for fewer than two values.
+    def get_variance(self):
+        return self.__squared_deviations / self.__count if self.__count > 1 else 0.0
+
+    def get_std(self):
+        return math.sqrt(self.get_variance())
+
+    # Estimated quantile, kept within the smallest and largest value seen. None if nothing was added.
+    def quantile(self, q):
+        estimate = self.__sketch.quantile(q)
+        if estimate is None:
+            return None
+        return min(max(estimate, self.__min), self.__max)
@@ -0,0 +1,148 @@
+import math
+import time
+import tkinter as tk
+from renderer import FRAME_INTERVAL
+
+# Time between two simulation steps at 1x speed, in milliseconds.
+TICK_INTERVAL = 500
+SPEEDS = (1, 2, 5, 10, 100, 1000)
+# When the loop falls further behind than this (seconds), the missed steps are dropped instead of caught up.
+MAX_BACKLOG = 0.25
+# Share of a frame that may be spent stepping the simulation; the rest is left for drawing and input.
+STEP_BUDGET = 0.75
+# Seconds of uninterrupted work per callback while skipping to the end, so the window stays responsive.
+SKIP_SLICE = 0.1
+SKIP_CHUNK = 1000  # Steps between two clock checks while skipping
+
+
+class GameScheduler:
+    # Steps the simulation on a fixed timestep and draws through the renderer at most once per frame.
+    # Step times are kept on an absolute schedule, so late callbacks do not push the following steps back.
+    # profiler: a TickProfiler timing every tick, or None.
+    def __init__(self, root, renderer, tick_interval=TICK_INTERVAL, frame_interval=FRAME_INTERVAL, clock=time.perf_counter,
+                 profiler=None):
+        self.__root = root              # Schedules the callbacks: the Tk root or a GameSession
+        self.__renderer = renderer
+        self.__tick_interval = tick_interval / 1000
+        self.__frame_interval = frame_interval
+        self.__clock = clock
+        self.__speed = 1
+        self.__simulation = None
+        self.__on_finished = None
+        self.__fast_forward = None
+        self.__next_tick = 0.0          # Clock time the next step is due
+        self.__skipping = False
+        self.__job = None
+        self.__profiler = profiler
+        self.__due = 0.0                # Clock time the pending callback was asked to run at
+
+    def get_speed(self):
+        return self.__speed
+
+    def set_speed(self, speed):
+        if speed <= 0:
+            raise ValueError("The speed must be positive.")
+        now = self.__clock()
+        # Keep the progress towards the next step, measured in the new speed
+        remaining = max(0.0, self.__next_tick - now) * self.__speed / speed
+        self.__speed = speed
+        self.__next_tick = now + remaining
+        if self.__job is not None:
+            self.__reschedule(0)
+
+    # Play simulation, first step after first_delay milliseconds. on_finished is called once the game is over.
+    # fast_forward(target_step) runs the skipped steps, simulation.fast_forward unless given.
+    def start(self, simulation, on_finished, first_delay=TICK_INTERVAL, fast_forward=None):
+        self.stop()
+        self.__simulation = simulation
+        self.__on_finished = on_finished
+        self.__fast_forward = fast_forward if fast_forward is not None else simulation.fast_forward
+        if self.__profiler is not None:
+            simulation.set_profiler(self.__profiler)
+        self.__skipping = False
+        self.__next_tick = self.__clock() + first_delay / 1000
+        self.__reschedule(first_delay)
+
+    def stop(self):
+        if self.__job is not None:
+            self.__root.after_cancel(self.__job)
+            self.__job = None
+
+    # Run the remaining steps without drawing them, then show the final state.
+    def skip_to_end(self):
+        if self.__simulation is None or self.__simulation.is_finished():
+            return
+        self.__skipping = True
+        self.__reschedule(0)
+
+    def get_profiler(self):
+        return self.__profiler
+
+    def __reschedule(self, delay):
+        if self.__job is not None:
+            self.__root.after_cancel(self.__job)
+        self.__after(delay)
+
+    def __after(self, delay):
+        if self.__profiler is not None:
+            self.__due = self.__clock() + delay / 1000
+        self.__job = self.__root.after(delay, self.__frame)
+
+    def __frame(self):
+        self.__job = None
+        simulation = self.__simulation
+        profiler = self.__profiler
+        if profiler is not None:
+            profiler.record("delay", max(0.0, self.__clock() - self.__due))
+        if self.__skipping:
+            self.__skip_slice()
+        else:
+            interval = self.__tick_interval / self.__speed
+            now = self.__clock()
+            if now - self.__next_tick > MAX_BACKLOG:
+                self.__next_tick = now  # Too far behind, e.g. after the window was dragged: resume from now
+            deadline = now + self.__frame_interval / 1000 * STEP_BUDGET
+            while self.__next_tick <= now and not simulation.is_finished():
+                simulation.step()
+                self.__next_tick += interval
+                if self.__clock() > deadline:
+                    break  # Catch up in the next frames instead of freezing this one
+            if profiler is None:
+                self.__renderer.flush()
+            else:
+                flush_time = self.__clock()
+                self.__renderer.flush()
+                profiler.record("canvas", self.__clock() - flush_time)
+
+        if simulation.is_finished():
+            self.__renderer.stop()
+            self.__on_finished()
+            return
+        if self.__skipping:
+            self.__after(1)
+            return
+        # Sleep until the next step is due, but never draw more often than once per frame
+        # Rounded up: waking up a fraction of a millisecond early would find no step due and sleep a whole frame
+        wait = math.ceil((self.__next_tick - self.__clock()) * 1000)
+        self.__after(max(self.__frame_interval, wait))
+
+    def __skip_slice(self):
+        simulation = self.__simulation
+        deadline = self.__clock() + SKIP_SLICE
+        while not simulation.is_finished() and self.__clock() < deadline:
+            self.__fast_forward(simulation.get_step_count() + SKIP_CHUNK)
+        if simulation.is_finished():
+            self.__renderer.sync(simulation.get_walkers())  # The renderer saw none of the skipped steps
+
+
+# Speed menu and "Skip to End" button for a game driven by scheduler.
+def create_speed_controls(parent, scheduler):
+    frame = tk.Frame(parent)
+    tk.Label(frame, text="Speed:").pack(side=tk.LEFT, padx=(10, 5))
+    speed_names = [f"{speed}x" for speed in SPEEDS]
+    selected_speed = tk.StringVar(frame, value=f"{scheduler.get_speed()}x")
+    speed_menu = tk.OptionMenu(frame, selected_speed, *speed_names,
+                               command=lambda name: scheduler.set_speed(int(name[:-1])))
+    speed_menu.pack(side=tk.LEFT, padx=(0, 15))
+    tk.Button(frame, text="Skip to End", command=scheduler.skip_to_end).pack(side=tk.LEFT, padx=(0, 10))
+    return frame
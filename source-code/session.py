@@ -0,0 +1,86 @@
+import tkinter as tk
+from audio import AudioService
+from running_stats import RunningStats
+
+
+class GameSession:
+    # One session per process: the Tk root and the audio service are created once and shared by every
+    # screen and every round, which only swap the widgets inside the root.
+    def __init__(self, root=None, audio=None, telemetry=None, profiler=None):
+        self.__root = root if root is not None else tk.Tk()
+        self.__audio = audio if audio is not None else AudioService()  # Music and speech, off the Tk thread
+        self.__telemetry = telemetry   # TelemetryRecorder for every game played, None to record nothing
+        self.__profiler = profiler     # TickProfiler timing the ticks of every game, None to time nothing
+        self.__statistics = {}         # Name -> RunningStats over every game of the session
+        self.__music_path = None       # Music file the audio service has loaded
+        self.__jobs = set()            # Pending after() callbacks of the current screen
+        self.__closed = False
+        self.__root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def get_root(self):
+        return self.__root
+
+    def get_audio(self):
+        return self.__audio
+
+    # Statistics kept across restarts and replays, created empty on first use.
+    def get_statistics(self, name):
+        if name not in self.__statistics:
+            self.__statistics[name] = RunningStats()
+        return self.__statistics[name]
+
+    # Record the steps of simulation, if this session records telemetry.
+    def record(self, simulation):
+        if self.__telemetry is not None:
+            self.__telemetry.attach(simulation)
+
+    def get_profiler(self):
+        return self.__profiler
+
+    def is_closed(self):
+        return self.__closed
+
+    # Like root.after, but the callback is cancelled by clear() if it has not run yet.
+    def after(self, delay, callback, *args):
+        def run():
+            self.__jobs.discard(job)
+            callback(*args)
+        job = self.__root.after(delay, run)
+        self.__jobs.add(job)
+        return job
+
+    def after_cancel(self, job):
+        self.__jobs.discard(job)
+        self.__root.after_cancel(job)
+
+    # Remove the widgets and pending callbacks of the current screen; the root window itself stays.
+    def clear(self):
+        for job in self.__jobs:
+            self.__root.after_cancel(job)
+        self.__jobs.clear()
+        for child in self.__root.winfo_children():
+            child.destroy()
+        self.__root.unbind("<Return>")
+        self.__root.protocol("WM_DELETE_WINDOW", self.close)
+
+    # Load the music once per session, however many rounds ask for it
+    def load_music(self, path):
+        if path != self.__music_path:
+            self.__audio.load_music(path)
+            self.__music_path = path
+
+    def mainloop(self):
+        self.__root.mainloop()
+
+    # Close the window, which ends mainloop(), and stop the audio worker.
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__root.destroy()
+        self.__audio.close()
+        if self.__telemetry is not None:
+            self.__telemetry.close()
+        if self.__profiler is not None:
+            print(self.__profiler.format_summary())
+            self.__profiler.dump()
@@ -0,0 +1,498 @@
+import colorsys
+import random
+import time
+from array import array
+from grid_topology import get_topology
+from move_log import MoveLog
+from occupancy import create_occupancy
+from running_stats import RunningStats
+
+# Game rules supported by the simulation.
+# RULE_MEET: the game ends as soon as two walkers share a cell (K-2 level).
+# RULE_MERGE: walkers sharing a cell merge into one group until a single group is left (3-5 level).
+#             Only one group merges per step, like in the original game loop.
+# RULE_MERGE_ALL: like RULE_MERGE, but every group formed during a step merges in that step, for large grids
+#                 with many walkers.
+# Every rule finds its collisions through an occupancy index updated on each move.
+RULE_MEET = "meet"
+RULE_MERGE = "merge"
+RULE_MERGE_ALL = "merge_all"
+RULES = (RULE_MEET, RULE_MERGE, RULE_MERGE_ALL)
+
+# Colors given to merged groups, in the order the merges happen.
+MERGE_COLORS = ["purple", "orange", "cyan"]
+MEET_COLOR = "purple"  # Color of the walkers once they have met
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+NO_GROUP = -1     # groups entry of a walker that is still on the board
+NO_STRATEGY = 0   # Strategy index of the walkers taking the uniform random walk
+
+
+# Distinct looking colors for any number of players: hues spaced by the golden ratio.
+def generate_color(index):
+    red, green, blue = colorsys.hsv_to_rgb((index * GOLDEN_RATIO_CONJUGATE) % 1.0, 0.7, 0.9)
+    return f"#{int(red * 255):02x}{int(green * 255):02x}{int(blue * 255):02x}"
+
+
+def merge_color(merge_index):
+    return MERGE_COLORS[merge_index] if merge_index < len(MERGE_COLORS) else generate_color(merge_index)
+
+
+class WalkerStore:
+    # State of every walker of a game as a struct of arrays, a few bytes per walker instead of an object each.
+    # Walker ids are handed out in order and never reused, so a walker's id is its slot in the arrays.
+    # Positions are the topology's shared (x, y) tuples, so moving a walker only writes an int.
+    def __init__(self, topology):
+        self.topology = topology
+        self.cells = array('i')         # Cell of every walker in the grid topology
+        self.groups = array('i')        # Id of the walker that replaced it in a merge, NO_GROUP while on the board
+        self.colors = array('I')        # Index of every walker's color in palette
+        self.strategies = array('H')    # Index of every walker's strategy in strategy_palette
+        self.palette = []               # Distinct colors of the walkers
+        self.strategy_palette = [None]  # Distinct AbstractWalkerStrategy of the walkers, None for the uniform walk
+        self.__color_indices = {}
+        self.__strategy_indices = {None: NO_STRATEGY}
+
+    def __len__(self):
+        return len(self.cells)
+
+    # Store a new walker and return its id.
+    def add(self, color, cell, strategy=None):
+        if strategy not in self.__strategy_indices:
+            self.__strategy_indices[strategy] = len(self.strategy_palette)
+            self.strategy_palette.append(strategy)
+        self.cells.append(cell)
+        self.groups.append(NO_GROUP)
+        self.colors.append(self.__color_index(color))
+        self.strategies.append(self.__strategy_indices[strategy])
+        return len(self.cells) - 1
+
+    def __color_index(self, color):
+        index = self.__color_indices.get(color)
+        if index is None:
+            index = self.__color_indices[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def get_position(self, walker_id):
+        return self.topology.positions[self.cells[walker_id]]
+
+    def get_color(self, walker_id):
+        return self.palette[self.colors[walker_id]]
+
+    def set_color(self, walker_id, color):
+        self.colors[walker_id] = self.__color_index(color)
+
+    def get_strategy(self, walker_id):
+        return self.strategy_palette[self.strategies[walker_id]]
+
+    # Record that the walkers walker_ids merged into the walker new_id.
+    def merge(self, walker_ids, new_id):
+        for walker_id in walker_ids:
+            self.groups[walker_id] = new_id
+
+    # Id of the walker on the board that walker_id has merged into, itself if it is still on the board.
+    def get_group(self, walker_id):
+        groups = self.groups
+        while groups[walker_id] != NO_GROUP:
+            walker_id = groups[walker_id]
+        return walker_id
+
+
+class Walker:
+    # View of one walker of a WalkerStore. It holds no state of its own, so it always shows the walker as it is now.
+    __slots__ = ("__store", "walker_id")
+
+    def __init__(self, store, walker_id):
+        self.__store = store
+        self.walker_id = walker_id  # Unique id, never reused within a simulation
+
+    def get_position(self):
+        return self.__store.get_position(self.walker_id)
+
+    def get_cell(self):
+        return self.__store.cells[self.walker_id]
+
+    def get_color(self):
+        return self.__store.get_color(self.walker_id)
+
+    # AbstractWalkerStrategy choosing the walker's moves, None for the uniform random walk.
+    def get_strategy(self):
+        return self.__store.get_strategy(self.walker_id)
+
+
+class MergeEvent:
+    def __init__(self, position, merged_ids, new_walker):
+        self.position = position        # Cell where the merge happened
+        self.merged_ids = merged_ids    # Ids of the walkers that were removed
+        self.new_walker = new_walker    # Walker that replaces them (None for RULE_MEET)
+
+
+class StepEvent:
+    def __init__(self, step, moves, merges, finished, duration=0.0):
+        self.step = step            # Number of steps taken so far, including this one
+        self.moves = moves          # List of (walker_id, old_position, new_position), None if nobody listened
+        self.merges = merges        # List of MergeEvent raised during this step
+        self.finished = finished    # True once the game is over
+        self.duration = duration    # Wall time the step took, in seconds
+
+
+class WanderingSimulation:
+    # topology: a GridTopology with blocked cells or wrapped edges; the open grid_size rectangle by default.
+    # strategies: one walker strategy for every player, or a list with one per start position (None entries
+    # walk uniformly). A merged group moves like the last of its walkers in walker order.
+    def __init__(self, grid_size, start_positions, rule=RULE_MERGE, rng=None, seed=None, replay_log=None, topology=None,
+                 strategies=None):
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule: {rule}")
+        if strategies is not None and replay_log is not None:
+            raise ValueError("Games with walker strategies are replayed from their seed, not from a move log.")
+        # Shared neighbor tables, the only place boundary, obstacle and wrap-around rules live
+        self.__topology = topology if topology is not None else get_topology(*grid_size)
+        self.__grid_size = self.__topology.get_size()  # Size of the grid (width, height)
+        self.__rule = rule
+        # Every game owns its generator. The seed is kept so the game can be played again move for move;
+        # it is unknown only when the caller passes its own generator.
+        if rng is None:
+            seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+            rng = random.Random(seed)
+        self.__seed = seed
+        self.__rng = rng
+        # Direction code of every move, in the order the walkers moved. Two bits cannot describe a walker
+        # that stays or jumps, so games with strategies keep no log and are replayed from their seed.
+        self.__move_log = MoveLog() if strategies is None else None
+        self.__replay_log = replay_log      # When given, moves are read from this log instead of drawn
+        self.__replay_index = 0
+        self.__listeners = []
+        self.__recorders = set()    # Listeners that also receive the steps of fast_forward()
+        self.__profiler = None      # TickProfiler timing the phases of every step, None to time nothing
+        self.__store = WalkerStore(self.__topology)
+
+        # start_positions is a list of (position, color) pairs, as used by the GUI levels.
+        self.__start_positions = list(start_positions)
+        if strategies is None or not isinstance(strategies, (list, tuple)):
+            strategies = [strategies] * len(self.__start_positions)
+        if len(strategies) != len(self.__start_positions):
+            raise ValueError("Give one walker strategy per start position.")
+        self.__strategies = list(strategies)
+        # Ids of the walkers on the board, in the order they move
+        self.__walker_ids = array('i', [self.__new_walker(color, position, strategy)
+                                        for (position, color), strategy in zip(start_positions, strategies)])
+
+        self.__step_count = 0       # Total number of steps taken
+        self.__total_moves = 0      # Steps taken since the last merge
+        self.__run_stats = RunningStats()  # Steps between consecutive merges, without keeping every value
+        self.__merge_count = 0      # Number of merges so far
+        self.__finished = False
+        self.__skipped = False      # True once skip_steps() moved the walkers without single steps
+
+        # Walkers on every cell, kept up to date move by move
+        self.__occupancy = create_occupancy(self.__topology.num_cells, len(self.__walker_ids))
+        for walker_id in self.__walker_ids:
+            self.__occupancy.add(self.__store.cells[walker_id], walker_id)
+
+    # Store a new walker and return its id.
+    def __new_walker(self, color, position, strategy=None):
+        cell = self.__topology.cell_of(position)
+        if self.__topology.degree(cell) == 0:
+            raise ValueError(f"Position {position} is walled in, a walker there could never move.")
+        return self.__store.add(color, cell, strategy)
+
+    # Register a callable that receives a StepEvent after every step. Listeners are muted during
+    # fast_forward(), unless they are recorders that must see every step (e.g. telemetry).
+    def subscribe(self, listener, recorder=False):
+        self.__listeners.append(listener)
+        if recorder:
+            self.__recorders.add(listener)
+
+    def unsubscribe(self, listener):
+        self.__listeners.remove(listener)
+        self.__recorders.discard(listener)
+
+    # Time the move, collision, merge and listener phases of every step with profiler (None to stop).
+    def set_profiler(self, profiler):
+        self.__profiler = profiler
+
+    def get_grid_size(self):
+        return self.__grid_size
+
+    def get_rule(self):
+        return self.__rule
+
+    # Views of the walkers on the board, in the order they move.
+    def get_walkers(self):
+        return [Walker(self.__store, walker_id) for walker_id in self.__walker_ids]
+
+    def get_positions(self):
+        store = self.__store
+        return [store.get_position(walker_id) for walker_id in self.__walker_ids]
+
+    # Id of the walker on the board that walker_id has merged into, walker_id itself if it is still there.
+    def get_group(self, walker_id):
+        return self.__store.get_group(walker_id)
+
+    def get_step_count(self):
+        return self.__step_count
+
+    # Statistics of the number of steps between consecutive merges (or until the walkers met).
+    def get_run_statistics(self):
+        return self.__run_stats
+
+    def get_merge_count(self):
+        return self.__merge_count
+
+    def is_finished(self):
+        return self.__finished
+
+    def get_topology(self):
+        return self.__topology
+
+    def get_seed(self):
+        return self.__seed
+
+    def get_move_log(self):
+        return self.__move_log
+
+    def get_valid_moves(self, position):
+        # Positions reachable from position in one move
+        topology = self.__topology
+        return [topology.position_of(cell) for cell in topology.neighbors(topology.cell_of(position))]
+
+    # Advance the game by one step and notify listeners. Returns the StepEvent; its moves are only
+    # collected when there are listeners.
+    def step(self):
+        if self.__finished:
+            raise RuntimeError("The simulation has already finished.")
+        start_time = time.perf_counter()
+
+        topology = self.__topology
+        offsets, targets, directions, positions = topology.offsets, topology.targets, topology.directions, topology.positions
+        random_value = self.__rng.random
+        replay_log = self.__replay_log
+        if replay_log is not None and self.__replay_index + len(self.__walker_ids) > len(replay_log):
+            raise RuntimeError("The move log has no more moves.")
+        move_occupant = self.__occupancy.move
+        store = self.__store
+        cells, strategy_indices, strategy_palette = store.cells, store.strategies, store.strategy_palette
+        record = self.__move_log.append_packed if self.__move_log is not None else None
+        packed = shift = 0  # Direction codes not yet written to the move log, two bits each
+        moves = [] if self.__listeners else None  # No tuple per move when nobody reads them, e.g. in fast_forward()
+
+        for walker_id in self.__walker_ids:
+            old_cell = cells[walker_id]
+            if strategy_indices[walker_id] != NO_STRATEGY:
+                cell = strategy_palette[strategy_indices[walker_id]].next_cell(topology, old_cell, self.__rng)
+            elif replay_log is None:
+                # Pick a random offset into the cell's neighbor list
+                start = offsets[old_cell]
+                index = start + int(random_value() * (offsets[old_cell + 1] - start))
+                cell = targets[index]
+                direction = directions[index]
+            else:
+                # Move the way the log says
+                direction = replay_log.get(self.__replay_index)
+                self.__replay_index += 1
+                cell = topology.move(old_cell, direction)
+            cells[walker_id] = cell
+            if moves is not None:
+                moves.append((walker_id, positions[old_cell], positions[cell]))
+
+            if record is not None:
+                packed |= direction << shift
+                shift += 2
+                if shift == 64:
+                    record(packed, 32)
+                    packed = shift = 0
+
+            move_occupant(walker_id, old_cell, cell)
+        if record is not None:
+            record(packed, shift >> 1)
+        self.__step_count += 1
+        self.__total_moves += 1
+        profiler = self.__profiler
+        if profiler is not None:
+            moved_time = time.perf_counter()
+
+        # Every walker moved, so the walkers of each cell are listed in walker order
+        crowded = self.__occupancy.crowded_cells()
+        if profiler is not None:
+            checked_time = time.perf_counter()
+        if not crowded:
+            merges = []
+        elif self.__rule == RULE_MEET:
+            merges = self.__check_meeting(crowded)
+        elif self.__rule == RULE_MERGE:
+            merges = self.__merge_players(crowded)
+        else:
+            merges = self.__merge_crowded(crowded)
+
+        end_time = time.perf_counter()
+        event = StepEvent(self.__step_count, moves, merges, self.__finished, end_time - start_time)
+        for listener in self.__listeners:
+            listener(event)
+        if profiler is not None:
+            profiler.record("move", moved_time - start_time)
+            profiler.record("collision", checked_time - moved_time)
+            profiler.record("merge", end_time - checked_time)
+            profiler.record("listeners", time.perf_counter() - end_time)
+        return event
+
+    # Run until the game is over, or until max_steps more steps were taken. Returns the step count.
+    def run(self, max_steps=None):
+        steps = 0
+        while not self.__finished and (max_steps is None or steps < max_steps):
+            self.step()
+            steps += 1
+        return self.__step_count
+
+    # Step without notifying listeners (recorders excepted) until target_step is reached or the game is over.
+    def fast_forward(self, target_step):
+        listeners = self.__listeners
+        self.__listeners = [listener for listener in listeners if listener in self.__recorders]
+        try:
+            while not self.__finished and self.__step_count < target_step:
+                self.step()
+        finally:
+            self.__listeners = listeners
+        return self.__step_count
+
+    # False if every step must be taken one by one: recorders must see each of them, and replays follow their log.
+    def can_skip_steps(self):
+        return not self.__recorders and self.__replay_log is None and not self.__finished
+
+    # Advance the game by steps steps at once, leaving the walkers on cells (one per walker, in walker order).
+    # For engines that sample many steps in one go; they must make sure no walkers met in between.
+    # Listeners hear nothing of the skipped steps, and the game cannot be exported any more.
+    def skip_steps(self, steps, cells):
+        if not self.can_skip_steps():
+            raise RuntimeError("This game has to be played step by step.")
+        store_cells = self.__store.cells
+        move_occupant = self.__occupancy.move
+        for walker_id, cell in zip(self.__walker_ids, cells):
+            old_cell = store_cells[walker_id]
+            store_cells[walker_id] = cell
+            move_occupant(walker_id, old_cell, cell)
+        if self.__occupancy.crowded_cells():
+            raise RuntimeError("Walkers met during the skipped steps.")
+        self.__step_count += steps
+        self.__total_moves += steps
+        self.__move_log = None
+        self.__skipped = True
+
+    # Everything needed to play this game again: start layout, seed and the packed move log
+    # (or the walker strategies, for games that are replayed from their seed).
+    def export(self):
+        if self.__skipped:
+            raise RuntimeError("A game that skipped steps cannot be played again move for move.")
+        if self.__move_log is None and self.__seed is None:
+            raise RuntimeError("A game with walker strategies can only be exported if its seed is known.")
+        strategies = None
+        if self.__move_log is None:
+            strategies = [None if strategy is None else strategy.to_dict() for strategy in self.__strategies]
+        return {
+            "grid_size": list(self.__grid_size),
+            "blocked": sorted([list(position) for position in self.__topology.blocked]),
+            "wrap": self.__topology.wrap,
+            "rule": self.__rule,
+            "start_positions": [[list(position), color] for position, color in self.__start_positions],
+            "seed": self.__seed,
+            "steps": self.__step_count,
+            "moves": None if self.__move_log is None else self.__move_log.to_dict(),
+            "strategies": strategies,
+        }
+
+    # A simulation that replays an exported game move for move, without needing its seed.
+    @classmethod
+    def from_export(cls, data):
+        start_positions = [(tuple(position), color) for position, color in data["start_positions"]]
+        width, height = data["grid_size"]
+        blocked = frozenset(tuple(position) for position in data.get("blocked", []))
+        topology = get_topology(width, height, blocked, data.get("wrap", False))
+        if data.get("strategies") is not None:
+            from strategies import strategy_from_dict  # Needs numpy, which plain games do without
+            strategies = [None if strategy is None else strategy_from_dict(strategy) for strategy in data["strategies"]]
+            return cls((width, height), start_positions, rule=data["rule"], seed=data["seed"], topology=topology,
+                       strategies=strategies)
+        return cls((width, height), start_positions, rule=data["rule"],
+                   replay_log=MoveLog.from_dict(data["moves"]), topology=topology)
+
+    # Index of every walker in the walker order, to tell which of several crowded cells comes first.
+    def __walker_order(self):
+        return {walker_id: index for index, walker_id in enumerate(self.__walker_ids)}
+
+    # Replace the walkers on cell by the walker new_id, in the occupancy index and in the walkers' groups.
+    def __replace_occupants(self, cell, new_id):
+        occupancy = self.__occupancy
+        merged_ids = list(occupancy.get_occupants(cell))
+        for walker_id in merged_ids:
+            occupancy.remove(cell, walker_id)
+        occupancy.add(cell, new_id)
+        self.__store.merge(merged_ids, new_id)
+        return merged_ids
+
+    def __check_meeting(self, crowded):
+        # The game is over as soon as two walkers share a cell. With several such cells, the one reported
+        # is where a walker first found someone already there, going through the walkers in order.
+        occupancy = self.__occupancy
+        cell = crowded[0]
+        if len(crowded) > 1:
+            order = self.__walker_order()
+            cell = min(crowded, key=lambda crowded_cell: order[occupancy.get_occupants(crowded_cell)[1]])
+        self.__finished = True
+        for walker_id in self.__walker_ids:
+            self.__store.set_color(walker_id, MEET_COLOR)
+        self.__update_statistics()
+        return [MergeEvent(self.__topology.position_of(cell), list(occupancy.get_occupants(cell)), None)]
+
+    def __merge_players(self, crowded):
+        # Only one group merges: the one holding the last walker, in walker order, that joined another
+        # (the last one found wins, as in the original game loop)
+        occupancy = self.__occupancy
+        store = self.__store
+        merged_cell = crowded[0]
+        if len(crowded) > 1:
+            order = self.__walker_order()
+            merged_cell = max(crowded, key=lambda cell: order[occupancy.get_occupants(cell)[-1]])
+        merged_position = self.__topology.position_of(merged_cell)
+        cells = store.cells
+        remaining = array('i', [walker_id for walker_id in self.__walker_ids if cells[walker_id] != merged_cell])
+
+        # Add new walker with merge color; it moves like the last walker of the group
+        strategy = store.get_strategy(occupancy.get_occupants(merged_cell)[-1])
+        new_id = self.__new_walker(merge_color(self.__merge_count), merged_position, strategy)
+        merged_ids = self.__replace_occupants(merged_cell, new_id)
+        remaining.append(new_id)
+        self.__merge_count += 1
+
+        self.__walker_ids = remaining
+        self.__update_statistics()
+        if len(self.__walker_ids) == 1:
+            self.__finished = True
+        return [MergeEvent(merged_position, merged_ids, Walker(store, new_id))]
+
+    def __merge_crowded(self, crowded):
+        # Merge every cell that holds more than one walker after the step, in the order they filled up
+        occupancy = self.__occupancy
+        store = self.__store
+        merges = []
+        new_ids = array('i')
+        for cell in crowded:
+            position = self.__topology.position_of(cell)
+            strategy = store.get_strategy(occupancy.get_occupants(cell)[-1])
+            new_id = self.__new_walker(merge_color(self.__merge_count), position, strategy)
+            merges.append(MergeEvent(position, self.__replace_occupants(cell, new_id), Walker(store, new_id)))
+            new_ids.append(new_id)
+            self.__merge_count += 1
+        self.__update_statistics()  # One run per step with merges, however many cells merged in it
+
+        # Merged walkers now belong to a group, the walkers still on the board to none
+        groups = store.groups
+        self.__walker_ids = array('i', [walker_id for walker_id in self.__walker_ids if groups[walker_id] == NO_GROUP])
+        self.__walker_ids.extend(new_ids)
+        if len(self.__walker_ids) == 1:
+            self.__finished = True
+        return merges
+
+    def __update_statistics(self):
+        # Add current move count to statistics and reset counter
+        self.__run_stats.add(self.__total_moves)
+        self.__total_moves = 0
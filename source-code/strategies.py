@@ -0,0 +1,201 @@
+import numpy as np
+from abstract_classes import AbstractWalkerStrategy
+from batch_simulation import MOVE_DRAWS, BYTE_LIMIT
+from grid_topology import DIRECTIONS, RIGHT
+
+
+class WeightedStrategy(AbstractWalkerStrategy):
+    # Stay on the cell with probability stay_probability, otherwise take one of the cell's valid moves with
+    # probability proportional to its direction's weight. The plain random walk has equal weights and never stays.
+    name = "weighted"
+
+    def __init__(self, direction_weights=(1, 1, 1, 1), stay_probability=0.0):
+        if len(direction_weights) != len(DIRECTIONS) or min(direction_weights) < 0:
+            raise ValueError(f"Give {len(DIRECTIONS)} non-negative direction weights.")
+        if not 0 <= stay_probability <= 1:
+            raise ValueError("The stay probability must be between 0 and 1.")
+        self.direction_weights = tuple(float(weight) for weight in direction_weights)
+        self.stay_probability = float(stay_probability)
+        self.__tables = {}  # Topology -> vectorized move table
+
+    def next_cell(self, topology, cell, rng):
+        if rng.random() < self.stay_probability:
+            return cell
+        start, end = topology.offsets[cell], topology.offsets[cell + 1]
+        weights = self.direction_weights
+        directions = topology.directions
+        total = sum(weights[directions[i]] for i in range(start, end))
+        if total == 0:
+            return cell  # Every valid move has weight 0
+        remaining = rng.random() * total
+        for i in range(start, end):
+            remaining -= weights[directions[i]]
+            if remaining < 0:
+                return topology.targets[i]
+        return topology.targets[end - 1]
+
+    # move_table[cell, byte] is the cell reached for a random byte, like batch_simulation's table but with
+    # a stay option and weighted moves. Probabilities are rounded to multiples of 1 / BYTE_LIMIT.
+    def __move_table(self, topology):
+        if topology in self.__tables:
+            return self.__tables[topology]
+        num_cells = topology.num_cells
+        step_table = np.frombuffer(topology.step_table, dtype=np.int32).reshape(num_cells, len(DIRECTIONS))
+        options = np.concatenate([np.arange(num_cells, dtype=np.int32)[:, None], step_table], axis=1)
+        move_weights = np.where(step_table >= 0, np.array(self.direction_weights), 0.0)
+        move_total = move_weights.sum(axis=1, keepdims=True)
+        stay = np.where(move_total[:, 0] > 0, self.stay_probability, 1.0)
+        move_share = np.divide(move_weights, move_total, out=np.zeros_like(move_weights), where=move_total > 0)
+        probabilities = np.concatenate([stay[:, None], move_share * (1 - stay[:, None])], axis=1)
+        cumulative = np.cumsum(probabilities, axis=1)
+
+        # Byte b picks the first option whose cumulative probability exceeds the middle of its slice
+        draws = (np.arange(MOVE_DRAWS) + 0.5) / BYTE_LIMIT
+        choice = np.zeros((num_cells, MOVE_DRAWS), dtype=np.intp)
+        for option in range(options.shape[1] - 1):
+            choice += draws[None, :] >= cumulative[:, option:option + 1]
+        table = np.take_along_axis(options, np.minimum(choice, options.shape[1] - 1), axis=1)
+        table[:, BYTE_LIMIT:] = -1  # Redraw
+        self.__tables[topology] = table.ravel()
+        return self.__tables[topology]
+
+    def next_cells(self, topology, cells, rng):
+        num_cells = topology.num_cells
+        table = self.__move_table(topology)
+        parked = cells >= num_cells
+        index = np.where(parked, 0, cells).astype(np.intp) * MOVE_DRAWS
+        moved = table[index + np.frombuffer(rng.bytes(cells.size), dtype=np.uint8).reshape(cells.shape)]
+        redraw = np.flatnonzero(moved == -1)
+        while redraw.size:
+            redrawn = np.frombuffer(rng.bytes(redraw.size), dtype=np.uint8)
+            moved.flat[redraw] = table[index.flat[redraw] + redrawn]
+            redraw = redraw[redrawn >= BYTE_LIMIT]
+        return np.where(parked, cells, moved).astype(cells.dtype)
+
+    def to_dict(self):
+        return {"name": self.name, "direction_weights": list(self.direction_weights),
+                "stay_probability": self.stay_probability}
+
+
+class UniformStrategy(WeightedStrategy):
+    # The game's own random walk: one of the valid moves, uniformly.
+    name = "uniform"
+
+    def __init__(self):
+        super().__init__()
+
+    def to_dict(self):
+        return {"name": self.name}
+
+
+class LazyStrategy(WeightedStrategy):
+    # A random walk that rests on its cell with probability stay_probability at every step.
+    name = "lazy"
+
+    def __init__(self, stay_probability=0.5):
+        super().__init__(stay_probability=stay_probability)
+
+    def to_dict(self):
+        return {"name": self.name, "stay_probability": self.stay_probability}
+
+
+class BiasedStrategy(WeightedStrategy):
+    # A random walk that takes direction bias times as often as any other valid direction.
+    name = "biased"
+
+    def __init__(self, direction=RIGHT, bias=2.0):
+        weights = [1.0] * len(DIRECTIONS)
+        weights[direction] = bias
+        super().__init__(direction_weights=weights)
+        self.direction = direction
+        self.bias = bias
+
+    def to_dict(self):
+        return {"name": self.name, "direction": self.direction, "bias": self.bias}
+
+
+class StayStillStrategy(WeightedStrategy):
+    # Never moves: the "wait for mommy" search protocol, where the others come looking.
+    name = "stay_still"
+
+    def __init__(self):
+        super().__init__(stay_probability=1.0)
+
+    def to_dict(self):
+        return {"name": self.name}
+
+
+class LevyStrategy(AbstractWalkerStrategy):
+    # Levy flight: a straight jump in a random valid direction, whose length follows a power law with the
+    # given exponent (P(length >= l) ~ l ** (1 - exponent)). The jump stops early at an edge or a blocked
+    # cell, and only the landing cell counts for meetings.
+    name = "levy"
+
+    def __init__(self, exponent=2.0, max_jump=None):
+        if exponent <= 1:
+            raise ValueError("The exponent must be greater than 1.")
+        self.exponent = float(exponent)
+        self.max_jump = max_jump  # None: the larger side of the grid
+
+    def __max_jump(self, topology):
+        return self.max_jump if self.max_jump is not None else max(topology.width, topology.height)
+
+    def next_cell(self, topology, cell, rng):
+        start, end = topology.offsets[cell], topology.offsets[cell + 1]
+        direction = topology.directions[start + int(rng.random() * (end - start))]
+        max_jump = self.__max_jump(topology)
+        tail = 1.0 - rng.random()
+        # Compared before the power, which overflows for exponents close to 1
+        if tail <= max_jump ** (1 - self.exponent):
+            length = max_jump
+        else:
+            length = int(tail ** (-1 / (self.exponent - 1)))
+        step_table = topology.step_table
+        for _ in range(length):
+            target = step_table[cell * len(DIRECTIONS) + direction]
+            if target < 0:
+                break
+            cell = target
+        return cell
+
+    def next_cells(self, topology, cells, rng):
+        num_cells = topology.num_cells
+        step_table = np.frombuffer(topology.step_table, dtype=np.int32)
+        parked = cells >= num_cells
+        current = np.where(parked, 0, cells).astype(np.intp)
+
+        # A random valid direction for every walker: draw again where the first step would be invalid
+        direction = rng.integers(0, len(DIRECTIONS), size=cells.shape)
+        invalid = np.flatnonzero(step_table[current * len(DIRECTIONS) + direction] < 0)
+        while invalid.size:
+            direction.flat[invalid] = rng.integers(0, len(DIRECTIONS), size=invalid.size)
+            invalid = invalid[step_table[current.flat[invalid] * len(DIRECTIONS) + direction.flat[invalid]] < 0]
+
+        max_jump = self.__max_jump(topology)
+        tail = 1.0 - rng.random(cells.shape)
+        lengths = np.full(cells.shape, max_jump, dtype=np.int64)
+        short = tail > max_jump ** (1 - self.exponent)  # As in next_cell, only these are raised to the power
+        lengths[short] = (tail[short] ** (-1 / (self.exponent - 1))).astype(np.int64)
+        lengths[parked] = 0
+        for step in range(int(lengths.max(initial=0))):
+            jumping = lengths > step
+            target = step_table[current * len(DIRECTIONS) + direction]
+            stopped = jumping & (target < 0)
+            lengths[stopped] = step  # Hit an edge or a blocked cell: the jump ends here
+            current = np.where(jumping & ~stopped, target, current)
+        return np.where(parked, cells, current).astype(cells.dtype)
+
+    def to_dict(self):
+        return {"name": self.name, "exponent": self.exponent, "max_jump": self.max_jump}
+
+
+STRATEGIES = {strategy.name: strategy for strategy in
+              (WeightedStrategy, UniformStrategy, LazyStrategy, BiasedStrategy, StayStillStrategy, LevyStrategy)}
+
+
+def strategy_from_dict(data):
+    params = dict(data)
+    name = params.pop("name")
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown walker strategy: {name}")
+    return STRATEGIES[name](**params)
@@ -0,0 +1,222 @@
+import argparse
+import json
+import queue
+import struct
+import sys
+import threading
+from array import array
+from simulation import WanderingSimulation, RULES, RULE_MERGE
+
+# Columns of a telemetry batch, in the order they are stored. Each group has one row per step, per move
+# (new position of a walker), per merge and per merged walker id.
+STEP_COLUMNS = (("game", "I"), ("step", "I"), ("duration", "d"), ("move_count", "I"))
+MOVE_COLUMNS = (("walker_id", "i"), ("x", "i"), ("y", "i"))
+MERGE_COLUMNS = (("merge_game", "I"), ("merge_step", "I"), ("merge_x", "i"), ("merge_y", "i"),
+                 ("merge_size", "I"), ("new_walker_id", "i"))
+MERGED_ID_COLUMNS = (("merged_id", "i"),)
+COLUMN_GROUPS = (STEP_COLUMNS, MOVE_COLUMNS, MERGE_COLUMNS, MERGED_ID_COLUMNS)
+
+COLUMNAR_MAGIC = b"WWTELEM1"
+BLOCK_HEADER = struct.Struct("<IIII")  # Rows of each column group in the block
+DEFAULT_BATCH_SIZE = 1024   # Steps per batch handed to the writer thread
+MAX_BATCH_MOVES = 65536     # Moves per batch, so games with many walkers hand over smaller batches
+DEFAULT_MAX_PENDING = 8     # Batches waiting for the writer before the game has to wait for it
+NO_WALKER = -1              # new_walker_id of a RULE_MEET meeting, where nobody is replaced
+
+
+class TelemetryBatch:
+    # Steps and merges of one or more games in columns of typed arrays, cheap to fill and to write.
+    def __init__(self):
+        self.columns = {name: array(code) for group in COLUMN_GROUPS for name, code in group}
+
+    def __len__(self):
+        return len(self.columns["step"])
+
+    def add_step(self, game, event):
+        columns = self.columns
+        columns["game"].append(game)
+        columns["step"].append(event.step)
+        columns["duration"].append(event.duration)
+        columns["move_count"].append(len(event.moves))
+        walker_ids, xs, ys = columns["walker_id"], columns["x"], columns["y"]
+        for walker_id, _, (x, y) in event.moves:
+            walker_ids.append(walker_id)
+            xs.append(x)
+            ys.append(y)
+        for merge in event.merges:
+            columns["merge_game"].append(game)
+            columns["merge_step"].append(event.step)
+            columns["merge_x"].append(merge.position[0])
+            columns["merge_y"].append(merge.position[1])
+            columns["merge_size"].append(len(merge.merged_ids))
+            columns["new_walker_id"].append(NO_WALKER if merge.new_walker is None else merge.new_walker.walker_id)
+            columns["merged_id"].extend(merge.merged_ids)
+
+    # Step and merge records as dictionaries, each merge right after the step it happened in.
+    def records(self):
+        columns = self.columns
+        move_index = merge_index = merged_index = 0
+        num_merges = len(columns["merge_step"])
+        for row in range(len(self)):
+            game, step, move_count = columns["game"][row], columns["step"][row], columns["move_count"][row]
+            positions = [[columns["walker_id"][i], columns["x"][i], columns["y"][i]]
+                         for i in range(move_index, move_index + move_count)]
+            move_index += move_count
+            yield {"type": "step", "game": game, "step": step, "duration": columns["duration"][row], "positions": positions}
+            while (merge_index < num_merges and columns["merge_game"][merge_index] == game
+                   and columns["merge_step"][merge_index] == step):
+                size = columns["merge_size"][merge_index]
+                new_walker_id = columns["new_walker_id"][merge_index]
+                yield {
+                    "type": "merge", "game": game, "step": step,
+                    "position": [columns["merge_x"][merge_index], columns["merge_y"][merge_index]],
+                    "merged_ids": columns["merged_id"][merged_index:merged_index + size].tolist(),
+                    "new_walker_id": None if new_walker_id == NO_WALKER else new_walker_id,
+                }
+                merged_index += size
+                merge_index += 1
+
+
+class NdjsonSink:
+    # One JSON object per line: a "step" record per step, followed by a "merge" record per merge in it.
+    def __init__(self, path):
+        self.__file = open(path, "w")
+
+    def write(self, batch):
+        self.__file.writelines(json.dumps(record) + "\n" for record in batch.records())
+
+    def close(self):
+        self.__file.close()
+
+
+class ColumnarSink:
+    # Binary file: COLUMNAR_MAGIC, then per batch a BLOCK_HEADER followed by every column's raw little-endian values.
+    def __init__(self, path):
+        self.__file = open(path, "wb")
+        self.__file.write(COLUMNAR_MAGIC)
+
+    def write(self, batch):
+        counts = [len(batch.columns[group[0][0]]) for group in COLUMN_GROUPS]
+        self.__file.write(BLOCK_HEADER.pack(*counts))
+        for group in COLUMN_GROUPS:
+            for name, _ in group:
+                column = batch.columns[name]
+                if sys.byteorder != "little":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(self.__file)
+
+    def close(self):
+        self.__file.close()
+
+
+# Batches stored by ColumnarSink, one per block.
+def read_columnar(path):
+    with open(path, "rb") as telemetry_file:
+        if telemetry_file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a telemetry file.")
+        while True:
+            header = telemetry_file.read(BLOCK_HEADER.size)
+            if not header:
+                return
+            counts = BLOCK_HEADER.unpack(header)
+            batch = TelemetryBatch()
+            for count, group in zip(counts, COLUMN_GROUPS):
+                for name, _ in group:
+                    column = batch.columns[name]
+                    column.fromfile(telemetry_file, count)
+                    if sys.byteorder != "little":
+                        column.byteswap()
+            yield batch
+
+
+# NDJSON for .ndjson and .jsonl files, the binary columnar format otherwise.
+def open_sink(path):
+    if path.endswith((".ndjson", ".jsonl")):
+        return NdjsonSink(path)
+    return ColumnarSink(path)
+
+
+class TelemetryRecorder:
+    # Collects the steps of attached simulations into batches and writes them on a background thread.
+    # At most max_pending full batches wait for the writer, so memory stays bounded however long the games run.
+    def __init__(self, sink, batch_size=DEFAULT_BATCH_SIZE, max_pending=DEFAULT_MAX_PENDING):
+        self.__sink = sink
+        self.__batch_size = batch_size
+        self.__batch = TelemetryBatch()
+        self.__pending = queue.Queue(maxsize=max_pending)
+        self.__games = 0
+        self.__error = None
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__write_batches, name="telemetry", daemon=True)
+        self.__thread.start()
+
+    # Record every step of simulation, including the ones it fast-forwards through.
+    def attach(self, simulation):
+        game = self.__games
+        self.__games += 1
+        simulation.subscribe(lambda event: self.__record(game, event), recorder=True)
+        return game
+
+    def __record(self, game, event):
+        if self.__closed:
+            return
+        self.__batch.add_step(game, event)
+        if len(self.__batch) >= self.__batch_size or len(self.__batch.columns["walker_id"]) >= MAX_BATCH_MOVES:
+            self.__pending.put(self.__batch)  # Waits only if the writer is max_pending batches behind
+            self.__batch = TelemetryBatch()
+
+    def __write_batches(self):
+        while True:
+            batch = self.__pending.get()
+            if batch is None:
+                return
+            if self.__error is None:
+                try:
+                    self.__sink.write(batch)
+                except OSError as e:
+                    self.__error = e  # Keep draining the queue so the game never blocks on a dead writer
+
+    # Write what is left and close the sink.
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        if len(self.__batch):
+            self.__pending.put(self.__batch)
+        self.__pending.put(None)
+        self.__thread.join()
+        self.__sink.close()
+        if self.__error is not None:
+            raise RuntimeError(f"Writing telemetry failed: {self.__error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play games without a window and record their telemetry.")
+    parser.add_argument("output", help="telemetry file; .ndjson or .jsonl for JSON lines, anything else for binary columns")
+    parser.add_argument("--grid", type=int, nargs=2, default=(15, 15), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--start", type=int, nargs=2, action="append", metavar=("X", "Y"),
+                        help="start position of a player, repeat for every player (default: two opposite corners)")
+    parser.add_argument("--rule", choices=RULES, default=RULE_MERGE)
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=None, help="stop each game after this many steps")
+    args = parser.parse_args(argv)
+
+    width, height = args.grid
+    starts = args.start or [(0, 0), (width - 1, height - 1)]
+    start_positions = [(tuple(position), "black") for position in starts]
+    recorder = TelemetryRecorder(open_sink(args.output))
+    try:
+        for game in range(args.games):
+            seed = None if args.seed is None else args.seed + game
+            simulation = WanderingSimulation((width, height), start_positions, rule=args.rule, seed=seed)
+            recorder.attach(simulation)
+            steps = simulation.run(args.max_steps)
+            print(f"Game {game}: {steps} steps, seed {simulation.get_seed()}")
+    finally:
+        recorder.close()
+
+
+if __name__ == "__main__":
+    main()